@@ -3,21 +3,21 @@ from flask_login import current_user, login_required
 import json
 from datetime import datetime, date
 from sqlalchemy import func, desc, or_
-import re
 
 def init_api_routes(app):
     
     @app.route('/api/recommendations', methods=['POST'])
     def get_ai_recommendations():
         """Get AI-powered project recommendations"""
-        from models import Project, Tag, Category
-        from app import db
+        from models import Project
+        from recommendations import get_top_recommendations
         try:
-            data = request.get_json()
+            data = request.get_json(silent=True) or {}
             project_id = data.get('projectId')
-            tags = data.get('tags', [])
-            category = data.get('category', '')
-            description = data.get('description', '')
+            try:
+                limit = max(1, min(int(data.get('limit', 3)), 20))
+            except (TypeError, ValueError):
+                return jsonify({'error': 'Invalid limit'}), 400
             
             if not project_id:
                 return jsonify({'error': 'Project ID required'}), 400
@@ -27,81 +27,8 @@ def init_api_routes(app):
             if not current_project:
                 return jsonify({'error': 'Project not found'}), 404
             
-            # Find similar projects using multiple criteria
-            recommendations = []
-            
-            # 1. Tag-based similarity
-            if tags:
-                tag_projects = Project.query.join(Project.tags).filter(
-                    Tag.name.in_(tags),
-                    Project.id != project_id,
-                    Project.is_published == True
-                ).distinct().all()
-                
-                for project in tag_projects:
-                    common_tags = set(tags) & set([tag.name for tag in project.tags])
-                    score = len(common_tags) / len(tags) if tags else 0
-                    recommendations.append({
-                        'project': project,
-                        'score': score * 0.4,
-                        'type': 'tag'
-                    })
-            
-            # 2. Category-based similarity
-            if category:
-                category_projects = Project.query.join(Category).filter(
-                    Category.name == category,
-                    Project.id != project_id,
-                    Project.is_published == True
-                ).all()
-                
-                for project in category_projects:
-                    recommendations.append({
-                        'project': project,
-                        'score': 0.3,
-                        'type': 'category'
-                    })
-            
-            # 3. Content-based similarity (simple keyword matching)
-            if description:
-                description_words = set(re.findall(r'\w+', description.lower()))
-                content_projects = Project.query.filter(
-                    Project.id != project_id,
-                    Project.is_published == True
-                ).all()
-                
-                for project in content_projects:
-                    project_words = set(re.findall(r'\w+', (project.description + ' ' + (project.content or '')).lower()))
-                    common_words = description_words & project_words
-                    
-                    if common_words:
-                        score = len(common_words) / max(len(description_words), len(project_words))
-                        if score > 0.1:  # Only consider if similarity > 10%
-                            recommendations.append({
-                                'project': project,
-                                'score': score * 0.3,
-                                'type': 'content'
-                            })
-            
-            # Combine and rank recommendations
-            project_scores = {}
-            for rec in recommendations:
-                project_id = rec['project'].id
-                if project_id in project_scores:
-                    project_scores[project_id]['score'] += rec['score']
-                else:
-                    project_scores[project_id] = {
-                        'project': rec['project'],
-                        'score': rec['score'],
-                        'types': [rec['type']]
-                    }
-            
-            # Sort by score and take top 3
-            sorted_recommendations = sorted(
-                project_scores.values(),
-                key=lambda x: x['score'],
-                reverse=True
-            )[:3]
+            # Serve top-N from the precomputed Recommendation table
+            sorted_recommendations = get_top_recommendations(current_project.id, limit=limit)
             
             # Format response
             response_data = []
@@ -317,6 +244,7 @@ def init_api_routes(app):
     @login_required
     def api_toggle_like(project_id):
         """Toggle like status for a project with duplicate prevention"""
+        from app import db
         try:
             from models import Like, Project
             
@@ -331,17 +259,19 @@ def init_api_routes(app):
             if existing_like:
                 # Unlike - remove the like
                 db.session.delete(existing_like)
+                Project.adjust_counter(project_id, 'likes_count', -1)
                 liked = False
             else:
                 # Like - add new like
                 new_like = Like(user_id=current_user.id, project_id=project_id)
                 db.session.add(new_like)
+                Project.adjust_counter(project_id, 'likes_count', 1)
                 liked = True
             
             db.session.commit()
             
-            # Get updated like count
-            likes_count = Like.query.filter_by(project_id=project_id).count()
+            # Get updated like count (reloaded from the stored counter)
+            likes_count = project.likes_count
             
             return jsonify({
                 'success': True,
@@ -358,6 +288,7 @@ def init_api_routes(app):
     @login_required  
     def api_add_comment(project_id):
         """Add comment to project with validation"""
+        from app import db
         try:
             from models import Comment, Project
             
@@ -382,10 +313,11 @@ def init_api_routes(app):
             )
             
             db.session.add(new_comment)
+            Project.adjust_counter(project_id, 'comments_count', 1)
             db.session.commit()
             
-            # Get total comments count
-            total_comments = Comment.query.filter_by(project_id=project_id).count()
+            # Get total comments count (reloaded from the stored counter)
+            total_comments = project.comments_count
             
             # Return comment data
             comment_data = {
@@ -1,4 +1,5 @@
 import os
+import time
 import logging
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
@@ -9,6 +10,9 @@ from werkzeug.middleware.proxy_fix import ProxyFix
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
 
+# Start of the cold start measured against the startup budget
+STARTUP_STARTED = time.perf_counter()
+
 class Base(DeclarativeBase):
     pass
 
@@ -51,80 +55,38 @@ with app.app_context():
     
     # Create all tables if they don't exist
     db.create_all()
-    
+
+    # Add columns introduced after the tables were first created
+    from schema_migrations import apply_schema_migrations
+    apply_schema_migrations()
+
+    # Full-text search index for /search (FTS5 on SQLite, tsvector on PostgreSQL)
+    from search_index import ensure_search_index
+    ensure_search_index()
+
+    # Language facets for /projects are precomputed at the end of each sync
+    from github_sync import ensure_language_facets
+    ensure_language_facets()
+
+    # Importing recommendations registers its job handler
+    import recommendations  # noqa: F401
+
     # Superadmin seeding disabled for security
     
     # GitHub credentials configured for on-demand sync
     logging.info("GitHub sync system initialized")
     
-    # Auto-configure GitHub credentials and sync repositories
-    try:
-        from crypto_utils import crypto_manager
-        from github_client import GitHubClient
-        from github_sync import GitHubSyncService
-        
-        # Check if GITHUB_TOKEN exists
-        github_token = os.environ.get('GITHUB_TOKEN')
-        if not github_token:
-            logging.warning("="*80)
-            logging.warning("GITHUB_TOKEN não configurado!")
-            logging.warning("Para carregar automaticamente seus projetos GitHub:")
-            logging.warning("1. Vá em Secrets (🔒) no painel lateral do Replit")
-            logging.warning("2. Adicione: GITHUB_TOKEN = seu_token_github")
-            logging.warning("3. Reinicie a aplicação")
-            logging.warning("="*80)
-        else:
-            # Initialize GitHub client and sync repositories
-            client = GitHubClient()
-            
-            # Validate and store credentials
-            if client.validate_connection():
-                # Get user info to store credentials
-                user_info = client.get_authenticated_user()
-                if user_info:
-                    username = user_info.get('login')
-                    
-                    if username:  # Only proceed if username is not None
-                        # Store encrypted credentials in database (if crypto available)
-                        try:
-                            if crypto_manager is not None:
-                                client.store_github_credentials(username, github_token)
-                                logging.info(f"GitHub credentials armazenadas para: {username}")
-                            else:
-                                logging.info(f"GitHub conectado para: {username} (sem criptografia)")
-                        except Exception as e:
-                            logging.warning(f"Aviso ao armazenar credenciais: {e}")
-                        
-                        # Perform initial sync of repositories
-                        try:
-                            sync_service = GitHubSyncService()
-                            logging.info(f"Iniciando sincronização de repositórios para {username}...")
-                            
-                            success, message, repos_synced = sync_service.sync_user_repositories(username)
-                            if success:
-                                logging.info(f"✅ Sincronização concluída: {repos_synced} repositórios carregados")
-                            else:
-                                logging.warning(f"⚠️ Sincronização parcial: {message}")
-                        except Exception as sync_error:
-                            logging.error(f"Erro na sincronização: {sync_error}")
-                        
-                else:
-                    logging.error("Não foi possível obter informações do usuário GitHub")
-            else:
-                logging.error("Token GitHub inválido - verifique suas permissões")
-        
-        # Start background sync (optional)
-        try:
-            from auto_sync_scheduler import start_background_sync
-            if start_background_sync():
-                logging.info("Sincronização automática em background ativada")
-        except Exception as e:
-            logging.debug(f"Background sync não iniciado: {e}")
-            
-    except Exception as e:
-        logging.warning(f"GitHub setup error: {e}")
-        logging.info("Sistema continuará sem sincronização GitHub")
+    # Sync and maintenance work runs from the persistent job queue; importing
+    # github_jobs registers its handlers
+    import github_jobs  # noqa: F401
+
+    # The job worker, GitHub credential setup, the initial sync and the
+    # recommendation refresh are started by startup_tasks.start_server_tasks()
+    # from main.py, so scripts importing the app neither queue nor claim jobs
 
 # Import and initialize API routes
 from api_routes import init_api_routes
 init_api_routes(app)
+
+from startup_tasks import record_startup_time
+record_startup_time(app, STARTUP_STARTED)
@@ -12,7 +12,9 @@ from datetime import datetime, timedelta
 # Safe imports to avoid circular dependencies
 try:
     from app import app, db
-    from github_sync import GitHubSyncService
+    from github_jobs import PRIORITY_SCHEDULED, enqueue_github_sync
+    from job_queue import job_worker
+    from leader_election import LeaderLease
     from models import GitHubCredentials, GitHubSyncLog
 except ImportError as e:
     print(f"Import error in auto_sync_scheduler: {e}")
@@ -22,48 +24,64 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class GitHubAutoSync:
-    """Automatic GitHub synchronization service"""
+    """
+    Automatic GitHub synchronization service
+    
+    Every process runs the loop, but only the leader (see leader_election)
+    queues sync jobs; the others keep trying to take the lease over in case it
+    dies. The job queue's workers run the syncs.
+    """
     
     def __init__(self, sync_interval_hours=6):
         self.sync_interval_hours = sync_interval_hours
         self.running = False
         self.sync_thread = None
+        self.lease = LeaderLease('github-auto-sync')
+        self._stop_event = threading.Event()
     
-    def start_auto_sync(self):
-        """Start automatic synchronization in background"""
+    def start_auto_sync(self, initial_sync=True):
+        """Start automatic synchronization in background (initial_sync=False waits one lease renewal first)"""
         if self.running:
             logger.info("Auto-sync já está rodando")
             return
         
         self.running = True
-        self.sync_thread = threading.Thread(target=self._sync_loop, daemon=True)
+        self._stop_event.clear()
+        self.sync_thread = threading.Thread(target=self._sync_loop, args=(initial_sync,), daemon=True)
         self.sync_thread.start()
         logger.info(f"Auto-sync iniciado (intervalo: {self.sync_interval_hours}h)")
     
     def stop_auto_sync(self):
         """Stop automatic synchronization"""
         self.running = False
+        self._stop_event.set()
         if self.sync_thread:
             self.sync_thread.join(timeout=5)
         logger.info("Auto-sync parado")
     
-    def _sync_loop(self):
-        """Main sync loop"""
-        # Run initial sync on startup
-        self._run_sync()
+    def _sync_loop(self, initial_sync=True):
+        """Main sync loop: renew the leader lease and sync on the leader when due"""
+        # Without the initial sync, give the startup job one renewal period to run first
+        if not initial_sync:
+            self._stop_event.wait(self.lease.renew_interval)
         
-        # Continue with scheduled syncs
         while self.running:
             try:
-                time.sleep(self.sync_interval_hours * 3600)  # Convert hours to seconds
-                if self.running:
-                    self._run_sync()
+                with app.app_context():
+                    is_leader = self.lease.acquire()
+                
+                if is_leader:
+                    self._run_sync(timedelta(hours=self.sync_interval_hours))
             except Exception as e:
                 logger.error(f"Erro no loop de sincronização: {e}")
-                time.sleep(300)  # Wait 5 minutes before retrying
+            
+            self._stop_event.wait(self.lease.renew_interval)
+        
+        with app.app_context():
+            self.lease.release()
     
-    def _run_sync(self):
-        """Run a single sync operation"""
+    def _run_sync(self, min_interval=timedelta(hours=1)):
+        """Queue a sync job unless the last sync started less than min_interval ago"""
         try:
             with app.app_context():
                 credentials = GitHubCredentials.query.filter_by(is_active=True).first()
@@ -80,19 +98,13 @@ class GitHubAutoSync:
                 
                 if last_sync and last_sync.started_at:
                     time_since_last = datetime.utcnow() - last_sync.started_at
-                    if time_since_last < timedelta(hours=1):
-                        logger.info("Pulando sync - muito recente")
+                    if time_since_last < min_interval:
+                        logger.debug("Pulando sync - muito recente")
                         return
                 
-                logger.info(f"Executando auto-sync para {username}")
-                
-                sync_service = GitHubSyncService()
-                success, message, repos_synced = sync_service.sync_user_repositories(username)
-                
-                if success:
-                    logger.info(f"Auto-sync concluído: {repos_synced} repositórios")
-                else:
-                    logger.error(f"Auto-sync falhou: {message}")
+                # Deduplicated: a sync still queued for this user is reused
+                job = enqueue_github_sync(username, priority=PRIORITY_SCHEDULED)
+                logger.info(f"Auto-sync para {username} enfileirado (job {job.id})")
                     
         except Exception as e:
             logger.error(f"Erro durante auto-sync: {e}")
@@ -100,7 +112,7 @@ class GitHubAutoSync:
 # Global instance
 auto_sync = GitHubAutoSync()
 
-def start_background_sync():
+def start_background_sync(initial_sync=True):
     """Start background synchronization service"""
     if not app:
         logger.error("App não disponível para auto-sync")
@@ -111,12 +123,12 @@ def start_background_sync():
         github_token = os.environ.get('GITHUB_TOKEN')
         if github_token:
             # Start sync even if no credentials in DB yet
-            auto_sync.start_auto_sync()
+            auto_sync.start_auto_sync(initial_sync)
             return True
             
         with app.app_context():
             if GitHubCredentials.query.filter_by(is_active=True).first():
-                auto_sync.start_auto_sync()
+                auto_sync.start_auto_sync(initial_sync)
                 return True
     except Exception as e:
         logger.error(f"Erro ao iniciar auto-sync: {e}")
@@ -128,6 +140,7 @@ def stop_background_sync():
 
 if __name__ == "__main__":
     print("Iniciando serviço de auto-sincronização...")
+    job_worker.start()
     if start_background_sync():
         print("✅ Serviço iniciado com sucesso!")
         try:
@@ -136,6 +149,7 @@ if __name__ == "__main__":
         except KeyboardInterrupt:
             print("\n🛑 Parando serviço...")
             stop_background_sync()
+            job_worker.stop()
             print("✅ Serviço parado")
     else:
         print("❌ Falha ao iniciar serviço - configure as credenciais primeiro")
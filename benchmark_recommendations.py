@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Benchmark: content similarity loop vs. TF-IDF index
+
+Compares the per-request keyword loop that /api/recommendations used to run
+(tokenize every project, pairwise set intersections) against TfidfIndex
+(built once, then one sparse matrix-vector product per query) on synthetic
+projects. Does not touch the database.
+
+Uso: python benchmark_recommendations.py [tamanhos...]   (padrão: 100 10000 100000)
+"""
+import re
+import sys
+import time
+import random
+from tfidf_engine import TfidfIndex
+
+VOCABULARY = [f"term{i}" for i in range(5000)]
+QUERIES = 20
+
+def make_documents(count: int, seed: int = 42) -> dict:
+    rng = random.Random(seed)
+    # Zipf-like term distribution so some words are common and most are rare
+    weights = [1 / (rank + 1) for rank in range(len(VOCABULARY))]
+    return {
+        doc_id: ' '.join(rng.choices(VOCABULARY, weights=weights, k=rng.randint(40, 200)))
+        for doc_id in range(1, count + 1)
+    }
+
+def legacy_top_k(documents: dict, source_id: int, k: int = 3) -> list:
+    """The previous per-request algorithm: regex tokenize everything and intersect sets"""
+    description_words = set(re.findall(r'\w+', documents[source_id].lower()))
+    scores = []
+    for doc_id, text_value in documents.items():
+        if doc_id == source_id:
+            continue
+        project_words = set(re.findall(r'\w+', text_value.lower()))
+        common_words = description_words & project_words
+        if common_words:
+            score = len(common_words) / max(len(description_words), len(project_words))
+            if score > 0.1:
+                scores.append((doc_id, score))
+    return sorted(scores, key=lambda item: item[1], reverse=True)[:k]
+
+def run(size: int):
+    documents = make_documents(size)
+    rng = random.Random(size)
+    query_ids = [rng.randint(1, size) for _ in range(QUERIES)]
+
+    # The legacy loop is O(N) tokenization per query; sample fewer queries at large sizes
+    legacy_queries = query_ids[:max(1, QUERIES * 1000 // size)] if size > 1000 else query_ids
+    started = time.perf_counter()
+    for query_id in legacy_queries:
+        legacy_top_k(documents, query_id)
+    legacy_per_query = (time.perf_counter() - started) / len(legacy_queries)
+
+    started = time.perf_counter()
+    index = TfidfIndex(documents)
+    build_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for query_id in query_ids:
+        index.top_k(query_id, k=3)
+    tfidf_per_query = (time.perf_counter() - started) / len(query_ids)
+
+    print(f"{size:>8} | {legacy_per_query * 1000:>12.2f} | {build_time:>10.2f} | "
+          f"{tfidf_per_query * 1000:>12.3f} | {legacy_per_query / tfidf_per_query:>8.0f}x")
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100, 10000, 100000]
+    print(f"{'projetos':>8} | {'loop ms/req':>12} | {'build s':>10} | {'tfidf ms/req':>12} | {'speedup':>9}")
+    for size in sizes:
+        run(size)
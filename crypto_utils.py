@@ -1,5 +1,11 @@
 import os
+import hmac
+import json
+import time
 import base64
+import hashlib
+import threading
+from typing import Dict, Optional, Tuple
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
@@ -7,6 +13,85 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+KDF_SALT = b'portfolio_github_salt'  # Static salt for consistency
+KDF_ITERATIONS = 100000
+# Optional file holding the derived key so new processes skip PBKDF2; it is
+# as sensitive as ENCRYPTION_KEY itself and is only read back if mode 0600
+KEY_CACHE_PATH = os.environ.get('ENCRYPTION_KEY_CACHE_PATH', '')
+# Seconds a decrypted value stays cached in memory (0 disables)
+DECRYPT_CACHE_TTL = float(os.environ.get('DECRYPT_CACHE_TTL', 300))
+DECRYPT_CACHE_SIZE = 64
+
+# Derived keys by fingerprint of (ENCRYPTION_KEY, salt, iterations), shared by every CryptoManager
+_derived_keys: Dict[str, bytes] = {}
+_derived_keys_lock = threading.Lock()
+
+def _key_fingerprint(encryption_key: str) -> str:
+    material = f'{KDF_ITERATIONS}:'.encode() + KDF_SALT + b':' + encryption_key.encode()
+    return hashlib.sha256(material).hexdigest()
+
+def _derive_key(encryption_key: str) -> bytes:
+    """PBKDF2 derivation of the Fernet key, at most once per process (and per key cache file)"""
+    fingerprint = _key_fingerprint(encryption_key)
+    with _derived_keys_lock:
+        key = _derived_keys.get(fingerprint)
+        if key is None:
+            key = _read_key_cache(encryption_key)
+        if key is None:
+            kdf = PBKDF2HMAC(
+                algorithm=hashes.SHA256(),
+                length=32,
+                salt=KDF_SALT,
+                iterations=KDF_ITERATIONS,
+            )
+            key = base64.urlsafe_b64encode(kdf.derive(encryption_key.encode()))
+            _write_key_cache(encryption_key, key)
+        _derived_keys[fingerprint] = key
+        return key
+
+def _key_check(key: bytes, encryption_key: str) -> str:
+    """Ties a cached derived key to the ENCRYPTION_KEY and KDF parameters it came from"""
+    return hmac.new(key, _key_fingerprint(encryption_key).encode(), hashlib.sha256).hexdigest()
+
+def _read_key_cache(encryption_key: str) -> Optional[bytes]:
+    if not KEY_CACHE_PATH:
+        return None
+    try:
+        st = os.stat(KEY_CACHE_PATH)
+        if st.st_mode & 0o077 or (hasattr(os, 'getuid') and st.st_uid != os.getuid()):
+            logger.warning(f"Ignoring derived key cache {KEY_CACHE_PATH}: must be owned by this user with mode 0600")
+            return None
+        with open(KEY_CACHE_PATH) as f:
+            cached = json.load(f)
+        key = cached['key'].encode()
+        if not hmac.compare_digest(cached['check'], _key_check(key, encryption_key)):
+            return None  # Written for another ENCRYPTION_KEY
+        return key
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Failed to read derived key cache: {e}")
+        return None
+
+def _write_key_cache(encryption_key: str, key: bytes):
+    if not KEY_CACHE_PATH:
+        return
+    tmp_path = f'{KEY_CACHE_PATH}.{os.getpid()}.tmp'
+    try:
+        directory = os.path.dirname(KEY_CACHE_PATH)
+        if directory:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'key': key.decode(), 'check': _key_check(key, encryption_key)}, f)
+        os.replace(tmp_path, KEY_CACHE_PATH)
+    except Exception as e:
+        logger.warning(f"Failed to write derived key cache: {e}")
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+
 class CryptoManager:
     """
     Manages encryption and decryption of sensitive data
@@ -14,6 +99,8 @@ class CryptoManager:
     
     def __init__(self):
         self._cipher = None
+        self._decrypted: Dict[str, Tuple[str, float]] = {}
+        self._decrypted_lock = threading.Lock()
         self._initialize_cipher()
     
     def _initialize_cipher(self):
@@ -24,14 +111,7 @@ class CryptoManager:
                 raise ValueError("ENCRYPTION_KEY environment variable not found")
             
             # Use PBKDF2 to derive a key from the environment variable
-            kdf = PBKDF2HMAC(
-                algorithm=hashes.SHA256(),
-                length=32,
-                salt=b'portfolio_github_salt',  # Static salt for consistency
-                iterations=100000,
-            )
-            key = base64.urlsafe_b64encode(kdf.derive(encryption_key.encode()))
-            self._cipher = Fernet(key)
+            self._cipher = Fernet(_derive_key(encryption_key))
             
         except Exception as e:
             logger.error(f"Failed to initialize encryption cipher: {e}")
@@ -55,14 +135,29 @@ class CryptoManager:
     def decrypt(self, encrypted_data: str) -> str:
         """
         Decrypt base64 encoded encrypted data and return the original string
+        Results are cached in memory for DECRYPT_CACHE_TTL seconds
         """
         try:
             if not encrypted_data:
                 return ""
             
+            now = time.monotonic()
+            with self._decrypted_lock:
+                cached = self._decrypted.get(encrypted_data)
+                if cached and cached[1] > now:
+                    return cached[0]
+            
             encrypted_bytes = base64.urlsafe_b64decode(encrypted_data.encode())
-            decrypted = self._cipher.decrypt(encrypted_bytes)
-            return decrypted.decode()
+            decrypted = self._cipher.decrypt(encrypted_bytes).decode()
+            
+            if DECRYPT_CACHE_TTL > 0:
+                with self._decrypted_lock:
+                    if len(self._decrypted) >= DECRYPT_CACHE_SIZE:
+                        self._decrypted = {k: v for k, v in self._decrypted.items() if v[1] > now}
+                        if len(self._decrypted) >= DECRYPT_CACHE_SIZE:
+                            self._decrypted.clear()
+                    self._decrypted[encrypted_data] = (decrypted, now + DECRYPT_CACHE_TTL)
+            return decrypted
             
         except Exception as e:
             logger.error(f"Failed to decrypt data: {e}")
@@ -70,16 +165,19 @@ class CryptoManager:
 
 # Global instance - conditionally initialized
 crypto_manager = None
+_crypto_manager_lock = threading.Lock()
 
 def get_crypto_manager():
     """Get crypto manager instance, creating it if needed and possible"""
     global crypto_manager
     if crypto_manager is None:
-        try:
-            crypto_manager = CryptoManager()
-        except ValueError as e:
-            logger.warning(f"Crypto manager unavailable: {e}")
-            return None
+        with _crypto_manager_lock:
+            if crypto_manager is None:
+                try:
+                    crypto_manager = CryptoManager()
+                except ValueError as e:
+                    logger.warning(f"Crypto manager unavailable: {e}")
+                    return None
     return crypto_manager
 
 # Try to initialize immediately, but don't fail if not possible
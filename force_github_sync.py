@@ -7,14 +7,14 @@ import os
 import sys
 import logging
 from app import app, db
-from github_client import GitHubClient
 from github_sync import GitHubSyncService
+from github_token_providers import EnvTokenProvider
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def force_sync():
-    """Força a sincronização dos repositórios GitHub"""
+def force_sync(full=False):
+    """Força a sincronização dos repositórios GitHub (full=True ignora o modo incremental)"""
     with app.app_context():
         try:
             # Verificar se há token GitHub
@@ -24,29 +24,12 @@ def force_sync():
                 logger.info("Configure o token em Secrets e tente novamente")
                 return False
             
-            # Inicializar cliente GitHub
-            client = GitHubClient()
+            # Serviço de sincronização usando o token do ambiente
+            sync_service = GitHubSyncService(EnvTokenProvider())
             
-            # Validar conexão
-            if not client.validate_connection():
-                logger.error("Falha na validação da conexão GitHub")
-                return False
-            
-            # Obter informações do usuário
-            user_info = client.get_authenticated_user()
-            if not user_info:
-                logger.error("Não foi possível obter informações do usuário")
-                return False
-            
-            username = user_info.get('login')
-            logger.info(f"Usuário GitHub conectado: {username}")
-            
-            # Inicializar serviço de sincronização
-            sync_service = GitHubSyncService()
-            
-            # Executar sincronização
-            logger.info("Iniciando sincronização forçada...")
-            success, message, repos_synced = sync_service.sync_user_repositories(username)
+            # Executar sincronização (o motor valida a conexão e identifica o usuário)
+            logger.info(f"Iniciando sincronização forçada{' completa' if full else ''}...")
+            success, message, repos_synced = sync_service.sync_authenticated_user(full=full)
             
             if success:
                 logger.info(f"✅ Sincronização bem-sucedida!")
@@ -75,7 +58,7 @@ def force_sync():
 
 if __name__ == "__main__":
     print("🚀 Forçando sincronização do GitHub...")
-    success = force_sync()
+    success = force_sync(full='--full' in sys.argv)
     
     if success:
         print("\n✅ Sincronização concluída com sucesso!")
@@ -0,0 +1,184 @@
+"""
+Bulk writer for synced GitHub repositories and their languages
+
+Repositories and language breakdowns are written with multi-row
+INSERT ... ON CONFLICT DO UPDATE statements (SQLite and PostgreSQL), in
+batches, on the caller's session. Nothing is committed here, so a whole sync
+lands in a single transaction.
+"""
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import delete, insert, not_, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from models import GitHubRepository, GitHubRepositoryLanguage
+from app import db
+
+logger = logging.getLogger(__name__)
+
+# Bound parameters allowed in one statement: SQLite builds before 3.32 stop at
+# 999, PostgreSQL's wire protocol at 65535. Batches are sized from these and
+# the number of parameters each row binds; multi-row VALUES also bind column
+# defaults, so a written row counts as the table's full width.
+_MAX_BIND_PARAMS = {
+    'sqlite': 999,
+    'postgresql': 32767,
+}
+DEFAULT_MAX_BIND_PARAMS = 999
+
+_UPSERT_INSERTS = {
+    'sqlite': sqlite.insert,
+    'postgresql': postgresql.insert,
+}
+
+def parse_github_datetime(value: Optional[str]) -> Optional[datetime]:
+    """Parse a GitHub ISO-8601 timestamp into a naive UTC datetime (as stored)"""
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    return parsed.astimezone(timezone.utc).replace(tzinfo=None)
+
+def repository_values(repo_data: Dict) -> Dict:
+    """Column values for a GitHubRepository row from a GitHub API repository payload"""
+    return {
+        'github_id': repo_data['id'],
+        'name': repo_data['name'],
+        'full_name': repo_data['full_name'],
+        'description': repo_data.get('description', ''),
+        'html_url': repo_data['html_url'],
+        'homepage': repo_data.get('homepage'),
+        'clone_url': repo_data['clone_url'],
+        'ssh_url': repo_data['ssh_url'],
+        'language': repo_data.get('language'),
+        'stargazers_count': repo_data.get('stargazers_count', 0),
+        'watchers_count': repo_data.get('watchers_count', 0),
+        'forks_count': repo_data.get('forks_count', 0),
+        'size': repo_data.get('size', 0),
+        'default_branch': repo_data.get('default_branch', 'main'),
+        'topics': json.dumps(repo_data.get('topics', [])),
+        'is_fork': repo_data.get('fork', False),
+        'is_private': repo_data.get('private', False),
+        'has_issues': repo_data.get('has_issues', True),
+        'has_projects': repo_data.get('has_projects', True),
+        'has_wiki': repo_data.get('has_wiki', True),
+        'archived': repo_data.get('archived', False),
+        'disabled': repo_data.get('disabled', False),
+        'pushed_at': parse_github_datetime(repo_data.get('pushed_at')),
+        'created_at_github': parse_github_datetime(repo_data.get('created_at')),
+        'updated_at_github': parse_github_datetime(repo_data.get('updated_at')),
+        'last_sync_at': datetime.utcnow(),
+    }
+
+def _batches(rows: List, params_per_row: int = 1, max_params: int = DEFAULT_MAX_BIND_PARAMS) -> Iterable[List]:
+    """Split rows so that no statement binds more than max_params parameters"""
+    size = max(1, max_params // max(1, params_per_row))
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+class GitHubBulkWriter:
+    """Batched, dialect-aware upserts for GitHubRepository and GitHubRepositoryLanguage"""
+
+    def __init__(self, session=None):
+        self.session = session or db.session
+        self.dialect = self.session.get_bind().dialect.name
+        self.upsert_insert = _UPSERT_INSERTS.get(self.dialect)
+        self.max_params = _MAX_BIND_PARAMS.get(self.dialect, DEFAULT_MAX_BIND_PARAMS)
+
+    def _batches(self, rows: List, params_per_row: int = 1) -> Iterable[List]:
+        return _batches(rows, params_per_row, self.max_params)
+
+    def upsert_repositories(self, rows: List[Dict]) -> Dict[int, int]:
+        """
+        Insert or update repositories keyed by github_id
+        Returns {github_id: repository id} for every row written
+        """
+        if not rows:
+            return {}
+
+        github_ids = [row['github_id'] for row in rows]
+        existing = {}
+        for batch in self._batches(github_ids):
+            existing.update(self.session.query(GitHubRepository.github_id, GitHubRepository.id).filter(
+                GitHubRepository.github_id.in_(batch)
+            ))
+
+        columns = len(GitHubRepository.__table__.columns)
+        if self.upsert_insert is not None:
+            for batch in self._batches(rows, columns):
+                stmt = self.upsert_insert(GitHubRepository).values(batch)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=['github_id'],
+                    set_={column: stmt.excluded[column] for column in batch[0] if column != 'github_id'}
+                )
+                self.session.execute(stmt)
+        else:
+            # Generic path: plain multi-row INSERT for new rows, bulk UPDATE by primary key for the rest
+            new_rows = [row for row in rows if row['github_id'] not in existing]
+            changed_rows = [dict(row, id=existing[row['github_id']]) for row in rows if row['github_id'] in existing]
+            for batch in self._batches(new_rows, columns):
+                self.session.execute(insert(GitHubRepository), batch)
+            for batch in self._batches(changed_rows, columns):
+                self.session.execute(update(GitHubRepository), batch)
+
+        ids = dict(existing)
+        new_ids = [github_id for github_id in github_ids if github_id not in existing]
+        for batch in self._batches(new_ids):
+            ids.update(self.session.query(GitHubRepository.github_id, GitHubRepository.id).filter(
+                GitHubRepository.github_id.in_(batch)
+            ))
+
+        logger.debug(f"Bulk upsert: {len(new_ids)} repositories created, {len(existing)} updated")
+        return ids
+
+    def replace_languages(self, languages_by_repository: Dict[int, Optional[Dict[str, int]]]):
+        """
+        Replace the language breakdown of each repository id
+        Repositories with missing data (None: failed or skipped lookup) keep their
+        stored languages; an empty breakdown clears them
+        """
+        languages_by_repository = {repository_id: languages for repository_id, languages
+                                   in languages_by_repository.items() if languages is not None}
+        if not languages_by_repository:
+            return
+
+        rows = []
+        for repository_id, languages in languages_by_repository.items():
+            total_bytes = sum(languages.values())
+            for language, bytes_count in languages.items():
+                rows.append({
+                    'repository_id': repository_id,
+                    'language': language,
+                    'bytes_count': bytes_count,
+                    'percentage': (bytes_count / total_bytes * 100) if total_bytes > 0 else 0,
+                })
+        columns = len(GitHubRepositoryLanguage.__table__.columns)
+
+        if self.upsert_insert is not None:
+            for batch in self._batches(rows, columns):
+                stmt = self.upsert_insert(GitHubRepositoryLanguage).values(batch)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=['repository_id', 'language'],
+                    set_={'bytes_count': stmt.excluded.bytes_count, 'percentage': stmt.excluded.percentage}
+                )
+                self.session.execute(stmt)
+
+            # Drop languages no longer reported for the refreshed repositories; each
+            # repository binds its id plus an (id, language) pair per language
+            widest = max(len(languages) for languages in languages_by_repository.values())
+            for batch in self._batches(list(languages_by_repository), 1 + 2 * widest):
+                current = [(repository_id, language) for repository_id in batch
+                           for language in languages_by_repository[repository_id]]
+                self.session.execute(delete(GitHubRepositoryLanguage).where(
+                    GitHubRepositoryLanguage.repository_id.in_(batch),
+                    not_(tuple_(GitHubRepositoryLanguage.repository_id, GitHubRepositoryLanguage.language).in_(current))
+                ))
+        else:
+            for batch in self._batches(list(languages_by_repository)):
+                self.session.execute(delete(GitHubRepositoryLanguage).where(
+                    GitHubRepositoryLanguage.repository_id.in_(batch)
+                ))
+            for batch in self._batches(rows, columns):
+                self.session.execute(insert(GitHubRepositoryLanguage), batch)
+
+        logger.debug(f"Bulk upsert: {len(rows)} languages for {len(languages_by_repository)} repositories")
@@ -1,12 +1,20 @@
 import os
 import json
+import time
 import logging
-from datetime import datetime, timezone
-from typing import Dict, List, Optional, Any
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, List, Optional, Any, Tuple
+from urllib.parse import urlparse
 import requests
+from requests.adapters import HTTPAdapter
 from flask import current_app
 from models import GitHubCredentials
 from app import db
+from github_http_cache import get_http_cache
+from github_token_providers import TokenProvider, default_token_provider, invalidate_credential_cache
+from github_rate_limit import (DEFAULT_RESOURCE, MAX_RETRIES, RateLimitExhausted, RateLimitScheduler, backoff_delay,
+                               get_rate_limit_scheduler)
 
 # Safe import of crypto_manager
 try:
@@ -17,6 +25,56 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# REST API root; point it at a stand-in server to replay recorded responses
+API_URL = os.environ.get('GITHUB_API_URL', 'https://api.github.com')
+# GraphQL endpoint; derived from the REST root when unset (see graphql_url_for)
+GRAPHQL_URL = os.environ.get('GITHUB_GRAPHQL_URL')
+# Concurrent requests allowed per API host, shared by all clients in the process
+MAX_CONCURRENT_REQUESTS_PER_HOST = int(os.environ.get('GITHUB_MAX_CONCURRENCY', 8))
+# Stop fanning out once the remaining rate limit drops to this many requests
+RATE_LIMIT_RESERVE = int(os.environ.get('GITHUB_RATE_LIMIT_RESERVE', 50))
+# Repositories per GraphQL page (GitHub's maximum for a connection)
+GRAPHQL_PAGE_SIZE = 100
+
+# Owned public repositories with stats, topics and language sizes, one page per request
+REPOSITORIES_QUERY = """
+query($login: String!, $pageSize: Int!, $cursor: String) {
+  repositoryOwner(login: $login) {
+    repositories(first: $pageSize, after: $cursor, privacy: PUBLIC, ownerAffiliations: OWNER,
+                 orderBy: {field: UPDATED_AT, direction: DESC}) {
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        databaseId name nameWithOwner description url homepageUrl sshUrl
+        primaryLanguage { name }
+        stargazerCount forkCount diskUsage
+        defaultBranchRef { name }
+        repositoryTopics(first: 20) { nodes { topic { name } } }
+        isFork isPrivate hasIssuesEnabled hasProjectsEnabled hasWikiEnabled isArchived isDisabled
+        pushedAt createdAt updatedAt
+        languages(first: 100, orderBy: {field: SIZE, direction: DESC}) { edges { size node { name } } }
+      }
+    }
+  }
+}
+"""
+
+_host_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+_host_semaphores_lock = threading.Lock()
+
+def _host_semaphore(url: str) -> threading.BoundedSemaphore:
+    host = urlparse(url).netloc
+    with _host_semaphores_lock:
+        if host not in _host_semaphores:
+            _host_semaphores[host] = threading.BoundedSemaphore(MAX_CONCURRENT_REQUESTS_PER_HOST)
+        return _host_semaphores[host]
+
+def graphql_url_for(base_url: str) -> str:
+    """GraphQL endpoint next to a REST root: GitHub Enterprise serves /api/v3 and /api/graphql"""
+    base_url = base_url.rstrip('/')
+    if base_url.endswith('/api/v3'):
+        return base_url[:-len('/v3')] + '/graphql'
+    return f'{base_url}/graphql'
+
 class GitHubAPIError(Exception):
     """Custom exception for GitHub API errors"""
     pass
@@ -26,73 +84,196 @@ class GitHubClient:
     GitHub API client using Replit's GitHub integration
     """
     
-    def __init__(self):
-        self.base_url = "https://api.github.com"
-        self.session = requests.Session()
+    def __init__(self, token_provider: Optional[TokenProvider] = None, base_url: Optional[str] = None,
+                 graphql_url: Optional[str] = None):
+        self.base_url = (base_url or API_URL).rstrip('/')
+        # An explicit base_url also moves GraphQL unless graphql_url is given too
+        if graphql_url is None:
+            graphql_url = GRAPHQL_URL if GRAPHQL_URL and not base_url else graphql_url_for(self.base_url)
+        self.graphql_url = graphql_url
+        self._local = threading.local()
+        self.token_provider = token_provider or default_token_provider()
         self._access_token = None
-        
-    def _get_access_token(self) -> str:
+        self._stats_lock = threading.Lock()
+        self.http_cache = get_http_cache()
+        self.cache_hits = 0
+        self.rate_limit_wait_seconds = 0.0
+        self.last_resource = DEFAULT_RESOURCE  # Rate-limit resource of the latest response
+    
+    @property
+    def session(self) -> requests.Session:
+        """Per-thread HTTP session (requests.Session is not thread-safe)"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_maxsize=MAX_CONCURRENT_REQUESTS_PER_HOST)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            self._local.session = session
+        return session
+    
+    def rate_limiter_for(self, resource: str) -> RateLimitScheduler:
+        """Scheduler shared by all clients using this host, token and rate-limit resource"""
+        return get_rate_limit_scheduler(urlparse(self.base_url).netloc, self._access_token, resource)
+    
+    @property
+    def rate_limiter(self) -> RateLimitScheduler:
+        """Scheduler of the resource this client used last (REST until a response says otherwise)"""
+        return self.rate_limiter_for(self.last_resource)
+    
+    def _request_resource(self, url: str) -> str:
+        """Rate-limit resource a request will count against, before its response names it"""
+        if url == self.graphql_url:
+            return 'graphql'
+        if urlparse(url).path.startswith(urlparse(self.base_url).path.rstrip('/') + '/search/'):
+            return 'search'
+        return DEFAULT_RESOURCE
+    
+    @property
+    def rate_limit_remaining(self) -> Optional[int]:
+        return self.rate_limiter.remaining
+    
+    @property
+    def rate_limit_reset(self) -> Optional[int]:
+        return self.rate_limiter.reset
+    
+    def rate_limit_low(self, resource: str = DEFAULT_RESOURCE) -> bool:
+        """True when the remaining budget of resource is at or below RATE_LIMIT_RESERVE"""
+        remaining = self.rate_limiter_for(resource).remaining
+        return remaining is not None and remaining <= RATE_LIMIT_RESERVE
+    
+    def rate_limit_budget(self) -> Dict[str, Any]:
+        """Current rate limit budget plus the time this client spent waiting on it"""
+        budget = self.rate_limiter.budget()
+        budget['waited_seconds'] = self.rate_limit_wait_seconds
+        return budget
+    
+    @staticmethod
+    def _is_rate_limited(response: requests.Response) -> bool:
+        """Primary (remaining 0) or secondary (Retry-After / message) rate limit response"""
+        if response.status_code == 429:
+            return True
+        if response.status_code != 403:
+            return False
+        return (response.headers.get('X-RateLimit-Remaining') == '0'
+                or 'Retry-After' in response.headers
+                or 'rate limit' in response.text.lower())
+    
+    @property
+    def anonymous(self) -> bool:
+        """True when requests go out without a token (public data only)"""
+        return self._get_access_token() is None
+    
+    def _get_access_token(self) -> Optional[str]:
         """
-        Get the GitHub access token from encrypted storage or environment
+        Get the GitHub access token from the configured token provider
+        Returns None only for anonymous providers
         """
         if self._access_token:
             return self._access_token
-            
-        # First try to get from database (encrypted storage)
-        try:
-            if crypto_manager is not None:
-                credentials = GitHubCredentials.query.filter_by(is_active=True).first()
-                if credentials:
-                    self._access_token = crypto_manager.decrypt(credentials.encrypted_token)
-                    # Update last used time
-                    credentials.last_used_at = datetime.utcnow()
-                    db.session.commit()
-                    return self._access_token
-        except Exception as e:
-            logger.warning(f"Failed to get token from database: {e}")
         
-        # Fallback to environment variable (for initial setup)
-        github_token = os.environ.get('GITHUB_TOKEN')
-        if github_token:
-            self._access_token = github_token
-            return github_token
+        token = self.token_provider.get_token()
+        if token:
+            self._access_token = token
+            return token
+        if self.token_provider.anonymous:
+            return None
             
         raise GitHubAPIError('GitHub access token not available. Please configure your GitHub credentials.')
     
-    def _make_request(self, method: str, endpoint: str, **kwargs) -> Dict[str, Any]:
+    def _make_request(self, method: str, endpoint: str, interactive: bool = False, **kwargs) -> Dict[str, Any]:
         """
         Make an authenticated request to the GitHub API
+        interactive=True (web requests): fail at once instead of waiting on the
+        rate limit, and don't retry
         """
         access_token = self._get_access_token()
         
         headers = kwargs.get('headers', {})
         headers.update({
-            'Authorization': f'token {access_token}',
             'Accept': 'application/vnd.github.v3+json',
             'User-Agent': 'ReplicationPortfolio/1.0'
         })
+        if access_token:
+            headers['Authorization'] = f'token {access_token}'
         kwargs['headers'] = headers
         
-        url = f"{self.base_url}/{endpoint.lstrip('/')}"
+        if endpoint.startswith(('https://', 'http://')):
+            url = endpoint
+        else:
+            url = f"{self.base_url}/{endpoint.lstrip('/')}"
         
-        try:
-            response = self.session.request(method, url, **kwargs)
+        # Conditional GET: a 304 reuses the stored body and costs no rate limit
+        cache_entry = None
+        cache_key = None
+        if self.http_cache and method.upper() == 'GET':
+            full_url = requests.Request('GET', url, params=kwargs.get('params')).prepare().url
+            cache_key = self.http_cache.key(full_url, access_token)
+            cache_entry = self.http_cache.lookup(cache_key)
+            headers.update(self.http_cache.conditional_headers(cache_entry))
+        
+        resource = self._request_resource(url)
+        scheduler = self.rate_limiter_for(resource)
+        max_retries = 0 if interactive else MAX_RETRIES
+        for attempt in range(max_retries + 1):
+            try:
+                waited = scheduler.acquire(max_wait=0) if interactive else scheduler.acquire()
+            except RateLimitExhausted as e:
+                raise GitHubAPIError(str(e))
+            if waited:
+                with self._stats_lock:
+                    self.rate_limit_wait_seconds += waited
             
-            # Handle rate limiting
-            if response.status_code == 403 and 'rate limit' in response.text.lower():
-                reset_time = response.headers.get('X-RateLimit-Reset')
-                if reset_time:
-                    reset_datetime = datetime.fromtimestamp(int(reset_time), tz=timezone.utc)
-                    raise GitHubAPIError(f'Rate limit exceeded. Resets at {reset_datetime}')
-                else:
-                    raise GitHubAPIError('Rate limit exceeded')
+            try:
+                with _host_semaphore(url):
+                    response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt < max_retries:
+                    delay = backoff_delay(attempt)
+                    logger.warning(f"GitHub API request failed ({e}), retrying in {delay:.1f}s")
+                    time.sleep(delay)
+                    continue
+                logger.error(f"GitHub API request failed: {e}")
+                raise GitHubAPIError(f'GitHub API request failed: {e}')
+            # Record against the budget GitHub says the request counted toward
+            counted = response.headers.get('X-RateLimit-Resource') or resource
+            if counted != resource:
+                resource, scheduler = counted, self.rate_limiter_for(counted)
+            scheduler.record(response.headers)
+            self.last_resource = resource
+            
+            if response.status_code == 304 and cache_entry:
+                with self._stats_lock:
+                    self.cache_hits += 1
+                self.http_cache.touch(cache_key)
+                return cache_entry['body']
             
-            response.raise_for_status()
-            return response.json()
+            # Rate limited: block the shared scheduler until the reset / Retry-After, then retry
+            if self._is_rate_limited(response):
+                scheduler.rate_limited(response.headers)
+                if attempt < max_retries:
+                    logger.warning(f"GitHub rate limit hit on {endpoint}, retry {attempt + 1}/{max_retries}")
+                    time.sleep(backoff_delay(0))
+                    continue
+                raise GitHubAPIError('Rate limit exceeded')
             
-        except requests.RequestException as e:
-            logger.error(f"GitHub API request failed: {e}")
-            raise GitHubAPIError(f'GitHub API request failed: {e}')
+            if response.status_code >= 500 and attempt < max_retries:
+                delay = backoff_delay(attempt)
+                logger.warning(f"GitHub API returned {response.status_code} for {endpoint}, retrying in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+            
+            try:
+                response.raise_for_status()
+                data = response.json()
+            except (requests.RequestException, ValueError) as e:
+                logger.error(f"GitHub API request failed: {e}")
+                raise GitHubAPIError(f'GitHub API request failed: {e}')
+            
+            if cache_key:
+                self.http_cache.store(cache_key, full_url, response.headers.get('ETag'),
+                                      response.headers.get('Last-Modified'), data)
+            return data
     
     def get_user_repositories(self, username: str, per_page: int = 100) -> List[Dict[str, Any]]:
         """
@@ -132,16 +313,126 @@ class GitHubClient:
         logger.info(f"Fetched {len(repositories)} repositories for user {username}")
         return repositories
     
-    def get_repository_languages(self, owner: str, repo: str) -> Dict[str, int]:
+    def graphql(self, query: str, variables: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Run a GraphQL query against graphql_url and return its data
+        GraphQL always needs a token; errors in the payload raise GitHubAPIError
+        """
+        if self._get_access_token() is None:
+            raise GitHubAPIError('GitHub GraphQL API requires an access token')
+        
+        response = self._make_request('POST', self.graphql_url, json={'query': query, 'variables': variables or {}})
+        if response.get('errors'):
+            messages = '; '.join(error.get('message', str(error)) for error in response['errors'])
+            raise GitHubAPIError(f'GitHub GraphQL error: {messages}')
+        return response.get('data') or {}
+    
+    @staticmethod
+    def _repository_from_graphql(node: Dict[str, Any]) -> Dict[str, Any]:
+        """Reshape a GraphQL repository node into the REST payload the sync pipeline expects"""
+        return {
+            'id': node['databaseId'],
+            'name': node['name'],
+            'full_name': node['nameWithOwner'],
+            'description': node.get('description'),
+            'html_url': node['url'],
+            'homepage': node.get('homepageUrl') or None,
+            'clone_url': f"{node['url']}.git",
+            'ssh_url': node.get('sshUrl'),
+            'language': (node.get('primaryLanguage') or {}).get('name'),
+            'stargazers_count': node.get('stargazerCount', 0),
+            'watchers_count': node.get('stargazerCount', 0),  # REST reports stargazers as watchers
+            'forks_count': node.get('forkCount', 0),
+            'size': node.get('diskUsage') or 0,
+            'default_branch': (node.get('defaultBranchRef') or {}).get('name', 'main'),
+            'topics': [topic['topic']['name'] for topic in (node.get('repositoryTopics') or {}).get('nodes', [])],
+            'fork': node.get('isFork', False),
+            'private': node.get('isPrivate', False),
+            'has_issues': node.get('hasIssuesEnabled', True),
+            'has_projects': node.get('hasProjectsEnabled', True),
+            'has_wiki': node.get('hasWikiEnabled', True),
+            'archived': node.get('isArchived', False),
+            'disabled': node.get('isDisabled', False),
+            'pushed_at': node.get('pushedAt'),
+            'created_at': node.get('createdAt'),
+            'updated_at': node.get('updatedAt'),
+        }
+    
+    def get_user_repositories_graphql(self, username: str,
+                                      page_size: int = GRAPHQL_PAGE_SIZE) -> Tuple[List[Dict[str, Any]], Dict[str, Dict[str, int]]]:
+        """
+        Get all public repositories for a user together with their languages
+        One GraphQL request per page_size repositories instead of 1 + N REST calls
+        Returns (repositories in REST shape, {repo_name: {language: bytes}})
+        """
+        repositories = []
+        languages = {}
+        cursor = None
+        
+        while True:
+            data = self.graphql(REPOSITORIES_QUERY, {'login': username, 'pageSize': page_size, 'cursor': cursor})
+            owner = data.get('repositoryOwner')
+            if owner is None:
+                raise GitHubAPIError(f'GitHub user {username} not found')
+            
+            connection = owner['repositories']
+            for node in connection['nodes']:
+                if not node:
+                    continue
+                repositories.append(self._repository_from_graphql(node))
+                languages[node['name']] = {edge['node']['name']: edge['size']
+                                           for edge in (node.get('languages') or {}).get('edges', [])}
+            
+            page_info = connection['pageInfo']
+            if not page_info['hasNextPage']:
+                break
+            cursor = page_info['endCursor']
+        
+        logger.info(f"Fetched {len(repositories)} repositories with languages for user {username} via GraphQL")
+        return repositories, languages
+    
+    def get_repository_languages(self, owner: str, repo: str) -> Optional[Dict[str, int]]:
         """
         Get programming languages used in a repository with byte counts
+        Returns None when the lookup failed ({} means the repository has no code)
         """
         try:
             response = self._make_request('GET', f'/repos/{owner}/{repo}/languages')
             return response
         except GitHubAPIError as e:
             logger.warning(f"Error fetching languages for {owner}/{repo}: {e}")
-            return {}
+            return None
+    
+    def get_repositories_languages(self, owner: str, repo_names: Iterable[str],
+                                   max_workers: int = MAX_CONCURRENT_REQUESTS_PER_HOST,
+                                   on_result: Optional[Callable[[str], None]] = None) -> Dict[str, Optional[Dict[str, int]]]:
+        """
+        Fetch languages for many repositories concurrently
+        Returns {repo_name: languages}; None for lookups that failed or were
+        skipped because the rate limit is nearly exhausted. on_result(repo_name) is called on the
+        calling thread as each lookup completes.
+        """
+        # Resolve the token here: the database lookup needs the caller's app context
+        self._get_access_token()
+        
+        def fetch(repo_name: str) -> Optional[Dict[str, int]]:
+            if self.rate_limit_low():
+                return None
+            return self.get_repository_languages(owner, repo_name)
+        
+        repo_names = list(repo_names)
+        results = {}
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            futures = {executor.submit(fetch, repo_name): repo_name for repo_name in repo_names}
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+                if on_result:
+                    on_result(futures[future])
+        
+        skipped = sum(1 for languages in results.values() if languages is None)
+        if skipped:
+            logger.warning(f"Skipped language lookup for {skipped} repositories - rate limit nearly exhausted")
+        return results
     
     def get_repository_details(self, owner: str, repo: str) -> Optional[Dict[str, Any]]:
         """
@@ -154,12 +445,13 @@ class GitHubClient:
             logger.warning(f"Error fetching details for {owner}/{repo}: {e}")
             return None
 
-    def get_authenticated_user(self) -> Optional[Dict[str, Any]]:
+    def get_authenticated_user(self, interactive: bool = False) -> Optional[Dict[str, Any]]:
         """
         Get the currently authenticated GitHub user
+        interactive=True returns None instead of waiting when rate limited
         """
         try:
-            response = self._make_request('GET', '/user')
+            response = self._make_request('GET', '/user', interactive=interactive)
             return response
         except GitHubAPIError:
             return None
@@ -197,6 +489,7 @@ class GitHubClient:
             
             db.session.add(credentials)
             db.session.commit()
+            invalidate_credential_cache()
             
             logger.info(f"GitHub credentials stored for user: {username}")
             return True
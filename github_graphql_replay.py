@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Replay recorded GitHub GraphQL responses against the GraphQL fetch path
+
+ReplayServer is a local stand-in for the GitHub API: it answers POST /graphql
+with the recorded response whose request (login, cursor) matches, from the
+JSON files in fixtures/github_graphql. The checks point a GitHubClient at it
+(base_url) and run get_user_repositories_graphql() end to end: paging,
+reshaping into the REST payload, languages, rate-limit headers and errors.
+
+    python github_graphql_replay.py
+
+The server can also back a manual sync: start it with --serve and run the app
+with GITHUB_API_URL=http://127.0.0.1:<port>.
+"""
+import os
+import sys
+import json
+import glob
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from app import app
+from github_client import GitHubAPIError, GitHubClient
+from github_token_providers import TokenProvider
+from github_bulk_writer import repository_values
+
+logger = logging.getLogger(__name__)
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'github_graphql')
+
+def load_fixtures(directory: str = FIXTURES_DIR) -> Dict[Tuple[str, Optional[str]], Dict]:
+    """Recorded responses keyed by the (login, cursor) of the request that produced them"""
+    fixtures = {}
+    for path in sorted(glob.glob(os.path.join(directory, '*.json'))):
+        with open(path) as f:
+            fixture = json.load(f)
+        fixtures[(fixture['request']['login'], fixture['request']['cursor'])] = fixture
+    return fixtures
+
+class ReplayServer:
+    """Stand-in GitHub API on 127.0.0.1 answering GraphQL requests from recorded fixtures"""
+
+    def __init__(self, fixtures: Optional[Dict] = None, port: int = 0):
+        self.fixtures = fixtures if fixtures is not None else load_fixtures()
+        self.requests: List[Dict] = []
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), self._handler())
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def _handler(self):
+        replay = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive, so the client's pooled connections are reused as against GitHub
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+            def _send(self, status: int, body, headers: Optional[Dict[str, str]] = None):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                if self.path.rstrip('/') != '/graphql':
+                    return self._send(404, {'message': 'Not Found'})
+                if not self.headers.get('Authorization'):
+                    return self._send(401, {'message': 'This endpoint requires you to be authenticated.'})
+                request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+                variables = request.get('variables') or {}
+                replay.requests.append(variables)
+
+                fixture = replay.fixtures.get((variables.get('login'), variables.get('cursor')))
+                if fixture is None:
+                    return self._send(200, {'data': None, 'errors': [
+                        {'message': f"No recorded response for {variables.get('login')} at cursor {variables.get('cursor')}"}
+                    ]})
+                self._send(fixture['status'], fixture['body'], fixture.get('headers'))
+
+        return Handler
+
+    def start(self) -> 'ReplayServer':
+        threading.Thread(target=self._server.serve_forever, daemon=True, name='graphql-replay').start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+class _FixtureTokenProvider(TokenProvider):
+    name = 'fixture'
+
+    def get_token(self) -> Optional[str]:
+        return 'fixture-token'
+
+def _expect(problems: List[str], condition: bool, message: str):
+    if not condition:
+        problems.append(message)
+
+def check_graphql_replay(base_url: str) -> List[Dict]:
+    """Run the GraphQL fetch path against a replay server; each result has name, ok and problems"""
+    client = GitHubClient(_FixtureTokenProvider(), base_url=base_url)
+    results = []
+
+    problems = []
+    repositories, languages = client.get_user_repositories_graphql('octo-fixture', page_size=2)
+    by_name = {repo['name']: repo for repo in repositories}
+    _expect(problems, sorted(by_name) == ['dotfiles', 'empty-fork', 'portfolio'],
+            f"repositories across both pages (null node skipped), got {sorted(by_name)}")
+    portfolio = by_name.get('portfolio', {})
+    _expect(problems, portfolio.get('id') == 700001 and portfolio.get('full_name') == 'octo-fixture/portfolio',
+            'databaseId/nameWithOwner mapped to id/full_name')
+    _expect(problems, portfolio.get('topics') == ['flask', 'portfolio'], 'topics flattened')
+    _expect(problems, portfolio.get('clone_url') == 'https://github.com/octo-fixture/portfolio.git', 'clone_url built from url')
+    _expect(problems, languages.get('portfolio') == {'Python': 52310, 'HTML': 18220, 'JavaScript': 6120, 'CSS': 2048},
+            'language sizes of portfolio')
+    fork = by_name.get('empty-fork', {})
+    _expect(problems, fork.get('default_branch') == 'main' and fork.get('language') is None and fork.get('size') == 0,
+            'null defaultBranchRef/primaryLanguage/diskUsage fall back to REST defaults')
+    _expect(problems, fork.get('fork') is True and fork.get('archived') is True and languages.get('empty-fork') == {},
+            'fork/archived flags and empty language list')
+    _expect(problems, by_name.get('dotfiles', {}).get('homepage') is None, "empty homepageUrl stored as None")
+    try:
+        rows = [repository_values(repo) for repo in repositories]
+        _expect(problems, all(row['created_at_github'] for row in rows), 'timestamps parse for the bulk writer')
+    except Exception as e:
+        problems.append(f'repository_values failed: {e}')
+    _expect(problems, client.rate_limit_remaining == 4990, 'rate limit budget read from the response headers')
+    results.append({'name': 'paged_repositories', 'ok': not problems, 'problems': problems})
+
+    for name, login, expected in (('unknown_owner', 'ghost-fixture', 'not found'),
+                                  ('graphql_errors', 'rate-limited-fixture', 'rate limit exceeded')):
+        problems = []
+        try:
+            client.get_user_repositories_graphql(login)
+            problems.append('no GitHubAPIError raised')
+        except GitHubAPIError as e:
+            _expect(problems, expected in str(e).lower(), f"error mentions '{expected}': {e}")
+        results.append({'name': name, 'ok': not problems, 'problems': problems})
+
+    return results
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    server = ReplayServer().start()
+    if '--serve' in sys.argv:
+        print(f"Replaying {len(server.fixtures)} recorded responses at {server.base_url} (Ctrl+C to stop)")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+        sys.exit(0)
+    try:
+        with app.app_context():
+            results = check_graphql_replay(server.base_url)
+    finally:
+        server.stop()
+    for result in results:
+        print(f"{'✅' if result['ok'] else '❌'} {result['name']}")
+        for problem in result['problems']:
+            print(f"   - {problem}")
+    sys.exit(0 if all(result['ok'] for result in results) else 1)
@@ -0,0 +1,130 @@
+"""
+Persistent conditional-request cache for the GitHub REST API
+
+Responses carrying an ETag or Last-Modified header are stored in a small
+SQLite file keyed by URL (and a hash of the token, so different accounts never
+share entries). Later requests send If-None-Match / If-Modified-Since; GitHub
+answers 304 without counting it against the rate limit and the stored body is
+reused. Entries not confirmed (stored or answered with 304) for
+GITHUB_HTTP_CACHE_MAX_AGE_DAYS are pruned, and the file keeps at most
+GITHUB_HTTP_CACHE_MAX_ENTRIES rows, dropping the least recently confirmed.
+"""
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import logging
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'github_http_cache.sqlite')
+MAX_AGE_SECONDS = float(os.environ.get('GITHUB_HTTP_CACHE_MAX_AGE_DAYS', 30)) * 86400
+MAX_ENTRIES = int(os.environ.get('GITHUB_HTTP_CACHE_MAX_ENTRIES', 5000))
+# Stores between two prune passes
+PRUNE_EVERY = 100
+
+class HTTPResponseCache:
+    """ETag/Last-Modified response store shared by threads and processes"""
+
+    def __init__(self, path: str, max_age: float = MAX_AGE_SECONDS, max_entries: int = MAX_ENTRIES):
+        self.path = path
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self._stores = 0
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS responses ('
+                'cache_key TEXT PRIMARY KEY, url TEXT NOT NULL, etag TEXT, last_modified TEXT, '
+                'body TEXT NOT NULL, stored_at REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_responses_stored_at ON responses (stored_at)')
+        self.prune()
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def key(url: str, token: Optional[str]) -> str:
+        identity = hashlib.sha256((token or '').encode()).hexdigest()[:16]
+        return hashlib.sha256(f'{identity} {url}'.encode()).hexdigest()
+
+    def lookup(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Return the stored entry (etag, last_modified, body) or None"""
+        with self._connect() as conn:
+            row = conn.execute(
+                'SELECT etag, last_modified, body FROM responses WHERE cache_key = ?', (cache_key,)
+            ).fetchone()
+        if not row:
+            return None
+        return {'etag': row[0], 'last_modified': row[1], 'body': json.loads(row[2])}
+
+    def conditional_headers(self, entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        headers = {}
+        if entry:
+            if entry['etag']:
+                headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def store(self, cache_key: str, url: str, etag: Optional[str], last_modified: Optional[str], body: Any):
+        if not etag and not last_modified:
+            return
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO responses (cache_key, url, etag, last_modified, body, stored_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (cache_key, url, etag, last_modified, json.dumps(body), time.time())
+            )
+        self._stores += 1
+        if self._stores % PRUNE_EVERY == 0:
+            self.prune()
+
+    def touch(self, cache_key: str):
+        """Mark an entry as confirmed by a 304 so it is not pruned while still in use"""
+        with self._connect() as conn:
+            conn.execute('UPDATE responses SET stored_at = ? WHERE cache_key = ?', (time.time(), cache_key))
+
+    def prune(self) -> int:
+        """Drop entries older than max_age, then the oldest beyond max_entries; returns rows deleted"""
+        try:
+            with self._connect() as conn:
+                deleted = conn.execute(
+                    'DELETE FROM responses WHERE stored_at < ?', (time.time() - self.max_age,)
+                ).rowcount
+                deleted += conn.execute(
+                    'DELETE FROM responses WHERE cache_key IN ('
+                    'SELECT cache_key FROM responses ORDER BY stored_at DESC LIMIT -1 OFFSET ?)',
+                    (self.max_entries,)
+                ).rowcount
+        except sqlite3.Error as e:
+            logger.warning(f"GitHub HTTP cache prune failed: {e}")
+            return 0
+        if deleted:
+            logger.debug(f"GitHub HTTP cache: {deleted} entries pruned")
+        return deleted
+
+_caches: Dict[str, HTTPResponseCache] = {}
+
+def get_http_cache() -> Optional[HTTPResponseCache]:
+    """Cache configured by GITHUB_HTTP_CACHE_PATH; set it to an empty string to disable"""
+    path = os.environ.get('GITHUB_HTTP_CACHE_PATH', DEFAULT_CACHE_PATH)
+    if not path:
+        return None
+    if path not in _caches:
+        try:
+            _caches[path] = HTTPResponseCache(path)
+        except Exception as e:
+            logger.warning(f"GitHub HTTP cache unavailable: {e}")
+            return None
+    return _caches[path]
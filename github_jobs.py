@@ -0,0 +1,116 @@
+"""
+Job queue handlers for GitHub sync work
+
+The admin route, the auto-sync scheduler and startup queue these jobs
+instead of syncing in their own thread; any process's job worker runs them.
+"""
+import json
+import logging
+from typing import Any, Dict, List, Optional
+from sqlalchemy import desc
+from github_sync import GitHubSyncService
+from github_token_providers import AnonymousTokenProvider
+from job_queue import ACTIVE_STATUSES, JobError, enqueue, register_handler
+from models import GitHubSyncLog, Job
+from app import db
+
+logger = logging.getLogger(__name__)
+
+# Manual syncs jump ahead of scheduled ones
+PRIORITY_MANUAL = 10
+PRIORITY_STARTUP = 5
+PRIORITY_SCHEDULED = 0
+
+@register_handler('github_sync')
+def github_sync_job(payload: Dict[str, Any]) -> Optional[str]:
+    token_provider = AnonymousTokenProvider() if payload.get('public') else None
+    sync_service = GitHubSyncService(token_provider)
+    success, message, repos_synced = sync_service.sync_user_repositories(
+        payload['username'], full=payload.get('full', False)
+    )
+    if not success:
+        raise JobError(message)
+    return message
+
+@register_handler('github_startup_sync')
+def github_startup_sync_job(payload: Dict[str, Any]) -> Optional[str]:
+    from startup_tasks import run_startup_sync
+    run_startup_sync()
+    return None
+
+def enqueue_github_sync(username: str, full: bool = False, public: bool = False,
+                        priority: int = PRIORITY_SCHEDULED) -> Job:
+    """
+    Queue a repository sync for username; a pending sync for the same user is reused
+    One requested while a sync for the user is running is queued to follow it
+    """
+    payload = {'username': username, 'full': full, 'public': public}
+    job = enqueue('github_sync', payload, dedup_key=f'github-sync:{username}', priority=priority)
+
+    # Upgrade a queued incremental sync when a full one (or higher priority) is requested
+    if job.status == 'pending':
+        queued = job.payload_data
+        merged = dict(queued, full=queued.get('full', False) or full,
+                      public=queued.get('public', False) and public)
+        if merged != queued or priority > job.priority:
+            job.payload = json.dumps(merged)
+            job.priority = max(job.priority, priority)
+            db.session.commit()
+    return job
+
+def active_sync_jobs() -> List[Job]:
+    """Pending and running sync jobs, in the order the workers will take them"""
+    return Job.query.filter(Job.kind == 'github_sync', Job.status.in_(ACTIVE_STATUSES)).order_by(
+        desc(Job.priority), Job.run_at, Job.id).all()
+
+def _isoformat(value):
+    return value.isoformat() + 'Z' if value else None
+
+def github_sync_status(username: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Queued sync jobs plus progress of the latest sync (for username, if given)
+    'active' stays true while any sync job is pending or running
+    """
+    jobs = active_sync_jobs()
+    query = GitHubSyncLog.query
+    if username:
+        query = query.filter_by(username=username)
+    sync_log = query.order_by(GitHubSyncLog.started_at.desc()).first()
+
+    sync = None
+    if sync_log:
+        sync = {
+            'id': sync_log.id,
+            'username': sync_log.username,
+            'status': sync_log.status,
+            'phase': sync_log.phase,
+            'repositories_total': sync_log.repositories_total,
+            'repositories_processed': sync_log.repositories_processed or 0,
+            'repositories_synced': sync_log.repositories_synced,
+            'repositories_skipped': sync_log.repositories_skipped,
+            'current_repository': sync_log.current_repository,
+            'repositories_per_second': sync_log.repositories_per_second,
+            'rate_limit_remaining': sync_log.rate_limit_remaining,
+            'rate_limit_limit': sync_log.rate_limit_limit,
+            'rate_limit_reset_at': _isoformat(sync_log.rate_limit_reset_at),
+            'rate_limit_wait_seconds': sync_log.rate_limit_wait_seconds,
+            'error_message': sync_log.error_message,
+            'started_at': _isoformat(sync_log.started_at),
+            'completed_at': _isoformat(sync_log.completed_at),
+        }
+
+    return {
+        'active': bool(jobs),
+        'jobs': [{
+            'id': job.id,
+            'status': job.status,
+            'username': job.payload_data.get('username'),
+            'full': job.payload_data.get('full', False),
+            'public': job.payload_data.get('public', False),
+            'attempts': job.attempts,
+            'max_attempts': job.max_attempts,
+            'run_at': _isoformat(job.run_at),
+            'last_error': job.last_error,
+        } for job in jobs],
+        'sync': sync,
+    }
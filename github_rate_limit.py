@@ -0,0 +1,154 @@
+"""
+Rate-limit-aware request scheduling for the GitHub API
+
+One RateLimitScheduler exists per API host, token and rate-limit resource:
+GitHub counts budgets per token (per IP for anonymous requests) and keeps a
+separate one for REST ('core'), GraphQL and search, named in each response's
+X-RateLimit-Resource. It is shared by every client and thread in the process.
+It reads X-RateLimit-Limit, -Remaining and -Reset from each response. Once the budget runs low it paces requests with a
+token bucket that refills evenly until the reset. A Retry-After (secondary
+limit) or an exhausted budget blocks requests until that time. Retries use
+jittered exponential backoff.
+"""
+import os
+import time
+import random
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+# Start spreading requests over the rest of the window below this many remaining
+PACE_BELOW = int(os.environ.get('GITHUB_RATE_LIMIT_PACE_BELOW', 500))
+# Requests that may go out back to back while pacing
+PACE_BURST = 5
+# Longest wait (seconds) for a reset or Retry-After before the request fails
+MAX_WAIT = float(os.environ.get('GITHUB_RATE_LIMIT_MAX_WAIT', 300))
+# Retries for rate-limited responses, 5xx and connection errors
+MAX_RETRIES = int(os.environ.get('GITHUB_MAX_RETRIES', 4))
+BACKOFF_BASE = float(os.environ.get('GITHUB_BACKOFF_BASE', 1.0))
+BACKOFF_MAX = 60.0
+# GitHub asks to wait at least a minute on a secondary limit without Retry-After
+SECONDARY_LIMIT_WAIT = 60.0
+# Budget of REST requests (X-RateLimit-Resource: core)
+DEFAULT_RESOURCE = 'core'
+
+class RateLimitExhausted(Exception):
+    """The next request would have to wait longer than allowed (MAX_WAIT by default)"""
+
+    def __init__(self, resume_at: float):
+        self.resume_at = datetime.utcfromtimestamp(resume_at)
+        super().__init__(f'Rate limit exceeded. Resumes at {self.resume_at} UTC')
+
+def backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff for the given retry attempt (0-based)"""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+def _header_int(headers: Mapping[str, str], name: str) -> Optional[int]:
+    value = headers.get(name)
+    try:
+        return int(float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+class RateLimitScheduler:
+    """Token bucket paced by the budget GitHub reports"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.reset: Optional[int] = None  # Epoch seconds
+        self.blocked_until = 0.0
+        self._tokens = float(PACE_BURST)
+        self._refilled_at = time.time()
+
+    def _delay(self, now: float) -> float:
+        """Seconds until the next request may go out (caller holds the lock)"""
+        if self.blocked_until > now:
+            return self.blocked_until - now
+        if self.remaining is None or self.reset is None or self.reset <= now:
+            return 0.0
+        if self.remaining <= 0:
+            return self.reset - now + 1
+
+        # Refill so the remaining budget lasts until the window resets
+        rate = self.remaining / max(self.reset - now, 1)
+        self._tokens = min(PACE_BURST, self._tokens + (now - self._refilled_at) * rate)
+        self._refilled_at = now
+        if self.remaining > PACE_BELOW or self._tokens >= 1:
+            return 0.0
+        return (1 - self._tokens) / rate
+
+    def acquire(self, max_wait: float = MAX_WAIT) -> float:
+        """
+        Block until a request may be sent; raises RateLimitExhausted past max_wait
+        (max_wait=0: never block). Returns the number of seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.time()
+                delay = self._delay(now)
+                if delay <= 0:
+                    if self.remaining is not None and self.remaining <= PACE_BELOW:
+                        self._tokens -= 1
+                    if self.remaining is not None and self.reset is not None and self.reset > now:
+                        self.remaining -= 1  # Count in-flight requests until headers arrive
+                    return waited
+                if delay > max_wait:
+                    raise RateLimitExhausted(now + delay)
+            waited += delay
+            log = logger.info if delay >= 1 else logger.debug
+            log(f"GitHub rate limit: waiting {delay:.1f}s ({self.remaining} requests left)")
+            time.sleep(delay)
+
+    def record(self, headers: Mapping[str, str]):
+        """Update the budget from a response's X-RateLimit-* headers"""
+        remaining = _header_int(headers, 'X-RateLimit-Remaining')
+        limit = _header_int(headers, 'X-RateLimit-Limit')
+        reset = _header_int(headers, 'X-RateLimit-Reset')
+        with self._lock:
+            if remaining is not None:
+                self.remaining = remaining
+            if limit is not None:
+                self.limit = limit
+            if reset is not None:
+                self.reset = reset
+
+    def rate_limited(self, headers: Mapping[str, str]):
+        """Block further requests after a 403/429 rate-limit response"""
+        now = time.time()
+        retry_after = _header_int(headers, 'Retry-After')
+        with self._lock:
+            if retry_after is not None:
+                wait = retry_after
+            elif self.remaining == 0 and self.reset:
+                wait = self.reset - now + 1
+            else:
+                wait = SECONDARY_LIMIT_WAIT
+            self.blocked_until = max(self.blocked_until, now + wait)
+
+    def budget(self) -> Dict[str, Any]:
+        """Current budget: remaining, limit and reset time (naive UTC)"""
+        with self._lock:
+            return {
+                'remaining': self.remaining,
+                'limit': self.limit,
+                'reset_at': datetime.utcfromtimestamp(self.reset) if self.reset else None,
+            }
+
+_schedulers: Dict[str, RateLimitScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+def get_rate_limit_scheduler(host: str, token: Optional[str], resource: str = DEFAULT_RESOURCE) -> RateLimitScheduler:
+    """Scheduler shared by every client using this host, token and rate-limit resource"""
+    identity = hashlib.sha256((token or '').encode()).hexdigest()[:16]
+    key = f'{host} {identity} {resource}'
+    with _schedulers_lock:
+        if key not in _schedulers:
+            _schedulers[key] = RateLimitScheduler()
+        return _schedulers[key]
@@ -1,30 +1,122 @@
-import json
+import os
+import time
 import logging
-from datetime import datetime, timezone
+from datetime import datetime
 from typing import Dict, List, Optional, Tuple
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy import delete, func, insert, literal, select
 from github_client import GitHubClient, GitHubAPIError
-from models import GitHubRepository, GitHubRepositoryLanguage, GitHubSyncLog
+from github_token_providers import TokenProvider
+from github_bulk_writer import GitHubBulkWriter, parse_github_datetime, repository_values
+from models import GitHubLanguageFacet, GitHubRepository, GitHubRepositoryLanguage, GitHubSyncLog
+from snapshot_cache import SnapshotCache
+from page_cache import invalidate_pages
 from app import db
 
 logger = logging.getLogger(__name__)
 
+# How repositories are listed: 'graphql' (batched, languages included), 'rest'
+# (listing plus one /languages call per repository) or 'auto' (GraphQL when a
+# token is available, falling back to REST on error)
+FETCH_MODE = os.environ.get('GITHUB_FETCH_MODE', 'auto').lower()
+# Minimum seconds between progress commits to the running sync log
+PROGRESS_INTERVAL = float(os.environ.get('GITHUB_SYNC_PROGRESS_INTERVAL', 1.0))
+
+def rebuild_language_facets():
+    """Recompute github_language_facets from the repository languages (one transaction)"""
+    now = datetime.utcnow()
+    db.session.execute(delete(GitHubLanguageFacet))
+    db.session.execute(insert(GitHubLanguageFacet).from_select(
+        ['language', 'repository_count', 'total_bytes', 'updated_at'],
+        select(
+            GitHubRepositoryLanguage.language,
+            func.count(GitHubRepositoryLanguage.repository_id),
+            func.coalesce(func.sum(GitHubRepositoryLanguage.bytes_count), 0),
+            literal(now, db.DateTime),
+        ).group_by(GitHubRepositoryLanguage.language)
+    ))
+    db.session.commit()
+    language_facets_cache.invalidate()
+    invalidate_pages('github')
+
+def ensure_language_facets():
+    """Build the facets once for databases synced before the table existed"""
+    if GitHubLanguageFacet.query.first() is None and GitHubRepositoryLanguage.query.first() is not None:
+        rebuild_language_facets()
+
+def _load_language_facets() -> List[Dict[str, int]]:
+    facets = GitHubLanguageFacet.query.order_by(
+        GitHubLanguageFacet.repository_count.desc(), GitHubLanguageFacet.language
+    ).all()
+    return [
+        {
+            'language': facet.language,
+            'repository_count': facet.repository_count,
+            'total_bytes': facet.total_bytes
+        }
+        for facet in facets
+    ]
+
+# Served from memory; invalidated by rebuild_language_facets() and reloaded by
+# other worker processes after the TTL
+language_facets_cache = SnapshotCache(_load_language_facets)
+
+def repositories_by_language_query(language: Optional[str] = None):
+    """Repositories (optionally with the given language) ordered by stars and recent activity"""
+    query = GitHubRepository.query
+    
+    if language:
+        # Join with language table to filter by language
+        query = query.join(GitHubRepositoryLanguage).filter(
+            GitHubRepositoryLanguage.language == language
+        )
+    
+    # Order by stars and recent activity
+    return query.order_by(
+        GitHubRepository.stargazers_count.desc(),
+        GitHubRepository.pushed_at.desc()
+    )
+
 class GitHubSyncService:
     """
     Service to sync GitHub repositories and cache them in the database
+    
+    This is the single sync engine: every entry point (admin route, scripts,
+    scheduler, public sync) uses it and only picks a token provider.
     """
     
-    def __init__(self):
-        self.client = GitHubClient()
+    def __init__(self, token_provider: Optional[TokenProvider] = None, fetch_mode: Optional[str] = None,
+                 base_url: Optional[str] = None, graphql_url: Optional[str] = None):
+        self.client = GitHubClient(token_provider, base_url=base_url, graphql_url=graphql_url)
+        self.fetch_mode = fetch_mode or FETCH_MODE
+        self._progress_reported_at = 0.0
+    
+    def sync_authenticated_user(self, full: bool = False) -> Tuple[bool, str, int]:
+        """
+        Sync repositories of the user owning the provider's token
+        Returns: (success: bool, message: str, repositories_synced: int)
+        """
+        user_info = self.client.get_authenticated_user()
+        username = user_info.get('login') if user_info else None
+        if not username:
+            return False, "Could not determine the authenticated GitHub user", 0
+        return self.sync_user_repositories(username, full=full, validated=True)
     
-    def sync_user_repositories(self, username: str) -> Tuple[bool, str, int]:
+    def sync_user_repositories(self, username: str, full: bool = False,
+                               validated: bool = False) -> Tuple[bool, str, int]:
         """
-        Sync all repositories for a given username
+        Sync repositories for a given username
+        
+        Incremental by default: repositories whose updated_at/pushed_at match the
+        stored values are skipped, and languages are only re-fetched when pushed_at
+        moved. full=True rewrites every repository and re-fetches all languages.
+        validated=True skips the /user connection check when the caller has just
+        resolved the token's user itself.
         Returns: (success: bool, message: str, repositories_synced: int)
         """
         sync_log = GitHubSyncLog()
         sync_log.username = username
         sync_log.status = 'running'
+        sync_log.phase = 'listing'
         sync_log.started_at = datetime.utcnow()
         db.session.add(sync_log)
         db.session.commit()
@@ -32,42 +124,126 @@ class GitHubSyncService:
         try:
             logger.info(f"Starting GitHub sync for user: {username}")
             
-            # Test connection first
-            if not self.client.validate_connection():
+            # Test connection first (anonymous syncs only read public endpoints)
+            if not validated and not self.client.anonymous and not self.client.validate_connection():
                 error_msg = "GitHub connection validation failed"
                 self._update_sync_log(sync_log, 'error', error_msg, 0)
                 return False, error_msg, 0
             
-            # Fetch repositories from GitHub
-            repositories = self.client.get_user_repositories(username)
+            # Fetch repositories from GitHub (GraphQL batches also carry the languages)
+            repositories, prefetched_languages = self._fetch_repositories(username)
             
             if not repositories:
                 message = f"No repositories found for user {username}"
                 self._update_sync_log(sync_log, 'success', None, 0)
                 return True, message, 0
             
-            synced_count = 0
-            errors = []
-            
+            # Compare listing watermarks with what is stored (one query)
+            stored = {
+                github_id: (updated_at, pushed_at)
+                for github_id, updated_at, pushed_at in db.session.query(
+                    GitHubRepository.github_id, GitHubRepository.updated_at_github, GitHubRepository.pushed_at
+                )
+            }
+            changed = []
+            needs_languages = []
+            skipped_ids = []
             for repo_data in repositories:
+                updated_at = parse_github_datetime(repo_data.get('updated_at'))
+                pushed_at = parse_github_datetime(repo_data.get('pushed_at'))
+                previous = stored.get(repo_data['id'])
+                if not full and previous == (updated_at, pushed_at):
+                    skipped_ids.append(repo_data['id'])
+                    continue
+                changed.append(repo_data)
+                if full or previous is None or previous[1] != pushed_at:
+                    needs_languages.append(repo_data['name'])
+            
+            # Unchanged repositories were still confirmed by this sync
+            if skipped_ids:
+                GitHubRepository.query.filter(GitHubRepository.github_id.in_(skipped_ids)).update(
+                    {GitHubRepository.last_sync_at: datetime.utcnow()}, synchronize_session=False)
+                db.session.commit()
+            sync_log.repositories_skipped = len(skipped_ids)
+            sync_log.repositories_total = len(repositories)
+            
+            # Unchanged repositories and those without a language lookup are done already
+            processed = len(repositories) - len(needs_languages)
+            self._report_progress(sync_log, 'languages', processed, force=True)
+            
+            if prefetched_languages is not None:
+                languages_by_repo = {name: prefetched_languages.get(name) for name in needs_languages}
+            else:
+                def language_fetched(repo_name: str):
+                    nonlocal processed
+                    processed += 1
+                    self._report_progress(sync_log, 'languages', processed, repo_name)
+                
+                # Fan the per-repository language lookups out over a thread pool;
+                # database writes below stay on this thread's session
+                languages_by_repo = self.client.get_repositories_languages(
+                    username, needs_languages, on_result=language_fetched)
+            self._report_progress(sync_log, 'writing', len(repositories) - len(changed), force=True)
+            
+            # Keep the stored pushed_at of repositories whose languages could not be
+            # fetched, so the next incremental sync sees them as pushed and retries
+            missing_languages = {name for name in needs_languages if languages_by_repo.get(name) is None}
+            
+            errors = []
+            rows = []
+            for repo_data in changed:
                 try:
-                    if self._sync_repository(username, repo_data):
-                        synced_count += 1
+                    values = repository_values(repo_data)
+                    if repo_data['name'] in missing_languages:
+                        previous = stored.get(repo_data['id'])
+                        values['pushed_at'] = previous[1] if previous else None
+                    rows.append(values)
                 except Exception as e:
                     error_msg = f"Error syncing repository {repo_data.get('name', 'unknown')}: {str(e)}"
                     errors.append(error_msg)
                     logger.error(error_msg)
             
+            # Repositories and languages go out as batched upserts in one transaction
+            writer = GitHubBulkWriter(db.session)
+            try:
+                repository_ids = writer.upsert_repositories(rows)
+                writer.replace_languages({
+                    repository_ids[repo_data['id']]: languages_by_repo.get(repo_data['name'])
+                    for repo_data in changed if repo_data['id'] in repository_ids
+                })
+                db.session.commit()
+                synced_count = len(rows)
+            except Exception as e:
+                db.session.rollback()
+                error_msg = f"Error writing repositories: {str(e)}"
+                errors.append(error_msg)
+                logger.error(error_msg)
+                synced_count = 0
+            
+            if synced_count and missing_languages:
+                error_msg = f"Languages not fetched for {len(missing_languages)} repositories; retried on the next sync"
+                errors.append(error_msg)
+                logger.warning(error_msg)
+            
+            if synced_count:
+                try:
+                    rebuild_language_facets()
+                except Exception as e:
+                    db.session.rollback()
+                    logger.error(f"Error rebuilding language facets: {e}")
+            
             # Determine final status
             if errors and synced_count == 0:
                 status = 'error'
                 message = f"Failed to sync any repositories. Errors: {'; '.join(errors[:3])}"
             elif errors:
                 status = 'partial'
-                message = f"Synced {synced_count}/{len(repositories)} repositories. Some errors occurred."
+                message = f"Synced {synced_count}/{len(changed)} changed repositories. Some errors occurred: {'; '.join(errors[:3])}"
             else:
                 status = 'success'
                 message = f"Successfully synced {synced_count} repositories"
+            if skipped_ids:
+                message += f" ({len(skipped_ids)} unchanged skipped)"
             
             self._update_sync_log(sync_log, status, message if errors else None, synced_count)
             
@@ -85,110 +261,20 @@ class GitHubSyncService:
             logger.error(error_msg)
             return False, error_msg, 0
     
-    def _sync_repository(self, username: str, repo_data: Dict) -> bool:
+    def _fetch_repositories(self, username: str) -> Tuple[List[Dict], Optional[Dict[str, Dict[str, int]]]]:
         """
-        Sync a single repository to the database
-        Returns True if successful, False otherwise
+        List the user's repositories using the configured fetch mode
+        Returns (repositories, languages by repository name or None when not prefetched)
         """
-        try:
-            github_id = repo_data['id']
-            
-            # Check if repository already exists
-            existing_repo = GitHubRepository.query.filter_by(github_id=github_id).first()
-            
-            if existing_repo:
-                # Update existing repository
-                repository = existing_repo
-                logger.debug(f"Updating existing repository: {repo_data['name']}")
-            else:
-                # Create new repository
-                repository = GitHubRepository()
-                repository.github_id = github_id
-                db.session.add(repository)
-                logger.debug(f"Creating new repository: {repo_data['name']}")
-            
-            # Update repository fields
-            self._update_repository_from_data(repository, repo_data)
-            
-            # Fetch and update languages
-            self._sync_repository_languages(repository, username, repo_data['name'])
-            
-            db.session.commit()
-            return True
-            
-        except Exception as e:
-            db.session.rollback()
-            logger.error(f"Error syncing repository {repo_data.get('name', 'unknown')}: {e}")
-            return False
-    
-    def _update_repository_from_data(self, repository: GitHubRepository, repo_data: Dict):
-        """
-        Update repository model with data from GitHub API
-        """
-        repository.name = repo_data['name']
-        repository.full_name = repo_data['full_name']
-        repository.description = repo_data.get('description', '')
-        repository.html_url = repo_data['html_url']
-        repository.homepage = repo_data.get('homepage')
-        repository.clone_url = repo_data['clone_url']
-        repository.ssh_url = repo_data['ssh_url']
-        repository.language = repo_data.get('language')
-        repository.stargazers_count = repo_data.get('stargazers_count', 0)
-        repository.watchers_count = repo_data.get('watchers_count', 0)
-        repository.forks_count = repo_data.get('forks_count', 0)
-        repository.size = repo_data.get('size', 0)
-        repository.default_branch = repo_data.get('default_branch', 'main')
-        repository.topics = json.dumps(repo_data.get('topics', []))
-        repository.is_fork = repo_data.get('fork', False)
-        repository.is_private = repo_data.get('private', False)
-        repository.has_issues = repo_data.get('has_issues', True)
-        repository.has_projects = repo_data.get('has_projects', True)
-        repository.has_wiki = repo_data.get('has_wiki', True)
-        repository.archived = repo_data.get('archived', False)
-        repository.disabled = repo_data.get('disabled', False)
-        
-        # Parse datetime fields
-        if repo_data.get('pushed_at'):
-            repository.pushed_at = datetime.fromisoformat(repo_data['pushed_at'].replace('Z', '+00:00'))
-        if repo_data.get('created_at'):
-            repository.created_at_github = datetime.fromisoformat(repo_data['created_at'].replace('Z', '+00:00'))
-        if repo_data.get('updated_at'):
-            repository.updated_at_github = datetime.fromisoformat(repo_data['updated_at'].replace('Z', '+00:00'))
-        
-        repository.last_sync_at = datetime.utcnow()
-    
-    def _sync_repository_languages(self, repository: GitHubRepository, owner: str, repo_name: str):
-        """
-        Fetch and update repository languages
-        """
-        try:
-            # Fetch languages from GitHub API
-            languages_data = self.client.get_repository_languages(owner, repo_name)
-            
-            if not languages_data:
-                return
-            
-            # Calculate total bytes for percentage calculation
-            total_bytes = sum(languages_data.values())
-            
-            # Clear existing languages
-            GitHubRepositoryLanguage.query.filter_by(repository_id=repository.id).delete()
-            
-            # Add new languages
-            for language, bytes_count in languages_data.items():
-                percentage = (bytes_count / total_bytes * 100) if total_bytes > 0 else 0
-                
-                lang_record = GitHubRepositoryLanguage()
-                lang_record.repository_id = repository.id
-                lang_record.language = language
-                lang_record.bytes_count = bytes_count
-                lang_record.percentage = percentage
-                db.session.add(lang_record)
-            
-            logger.debug(f"Updated {len(languages_data)} languages for {repo_name}")
-            
-        except Exception as e:
-            logger.warning(f"Error syncing languages for {repo_name}: {e}")
+        use_graphql = self.fetch_mode == 'graphql' or (self.fetch_mode == 'auto' and not self.client.anonymous)
+        if use_graphql:
+            try:
+                return self.client.get_user_repositories_graphql(username)
+            except GitHubAPIError as e:
+                if self.fetch_mode == 'graphql':
+                    raise
+                logger.warning(f"GraphQL fetch failed, falling back to REST: {e}")
+        return self.client.get_user_repositories(username), None
     
     def _update_sync_log(self, sync_log: GitHubSyncLog, status: str, error_message: Optional[str], repositories_synced: int):
         """
@@ -198,52 +284,49 @@ class GitHubSyncService:
         sync_log.error_message = error_message
         sync_log.repositories_synced = repositories_synced
         sync_log.completed_at = datetime.utcnow()
+        sync_log.phase = 'done'
+        if status != 'error' and sync_log.repositories_total is not None:
+            sync_log.repositories_processed = sync_log.repositories_total
+        sync_log.current_repository = None
+        self._record_rate_limit(sync_log)
+        db.session.commit()
+    
+    def _report_progress(self, sync_log: GitHubSyncLog, phase: str, processed: int,
+                         current_repository: Optional[str] = None, force: bool = False):
+        """
+        Commit the running sync's progress so the admin status endpoint can show it
+        Throttled to one commit per PROGRESS_INTERVAL seconds unless force=True
+        """
+        now = time.monotonic()
+        if not force and now - self._progress_reported_at < PROGRESS_INTERVAL:
+            return
+        self._progress_reported_at = now
+        sync_log.phase = phase
+        sync_log.repositories_processed = processed
+        sync_log.current_repository = current_repository
+        sync_log.progress_updated_at = datetime.utcnow()
+        self._record_rate_limit(sync_log)
         db.session.commit()
     
+    def _record_rate_limit(self, sync_log: GitHubSyncLog):
+        budget = self.client.rate_limit_budget()
+        sync_log.rate_limit_remaining = budget['remaining']
+        sync_log.rate_limit_limit = budget['limit']
+        sync_log.rate_limit_reset_at = budget['reset_at']
+        sync_log.rate_limit_wait_seconds = budget['waited_seconds']
+    
     def get_repositories_by_language(self, language: Optional[str] = None, limit: int = 50) -> List[GitHubRepository]:
         """
         Get repositories filtered by language
         """
-        query = GitHubRepository.query
-        
-        if language:
-            # Join with language table to filter by language
-            query = query.join(GitHubRepositoryLanguage).filter(
-                GitHubRepositoryLanguage.language == language
-            )
-        
-        # Order by stars and recent activity
-        repositories = query.order_by(
-            GitHubRepository.stargazers_count.desc(),
-            GitHubRepository.pushed_at.desc()
-        ).limit(limit).all()
-        
-        return repositories
+        return repositories_by_language_query(language).limit(limit).all()
     
     def get_all_languages(self) -> List[Dict[str, int]]:
         """
         Get all unique languages across all repositories with counts
+        Served from the cached language facets, rebuilt at the end of each sync
         """
-        from sqlalchemy import func
-        
-        languages = db.session.query(
-            GitHubRepositoryLanguage.language,
-            func.count(GitHubRepository.id).label('repository_count'),
-            func.sum(GitHubRepositoryLanguage.bytes_count).label('total_bytes')
-        ).join(GitHubRepository).group_by(
-            GitHubRepositoryLanguage.language
-        ).order_by(
-            func.count(GitHubRepository.id).desc()
-        ).all()
-        
-        return [
-            {
-                'language': lang.language,
-                'repository_count': lang.repository_count,
-                'total_bytes': lang.total_bytes
-            }
-            for lang in languages
-        ]
+        return language_facets_cache.get()
     
     def get_last_sync_info(self, username: str) -> Optional[GitHubSyncLog]:
         """
@@ -0,0 +1,209 @@
+"""
+Interchangeable sources for the GitHub access token
+
+GitHubClient asks its provider for a token on first use. Every sync entry
+point shares the same client and pipeline and only differs in the provider:
+
+- EnvTokenProvider: GITHUB_TOKEN (and the connector variable aliases)
+- EncryptedDBTokenProvider: active GitHubCredentials row, decrypted with crypto_manager
+  (cached process-wide; last_used_at is written in throttled batches)
+- ReplitConnectorTokenProvider: Replit connectors API (REPL_IDENTITY / WEB_REPL_RENEWAL);
+  a network call, so only used where asked for (sync_github_replit.py)
+- AnonymousTokenProvider: no token, public endpoints only (60 requests/hour)
+- ChainTokenProvider: first provider that yields a token
+"""
+import os
+import time
+import atexit
+import logging
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+import requests
+from flask import current_app
+from sqlalchemy import update
+from models import GitHubCredentials
+from app import db
+
+# Safe import of crypto_manager
+try:
+    from crypto_utils import crypto_manager
+except ImportError:
+    crypto_manager = None
+
+logger = logging.getLogger(__name__)
+
+# Seconds a decrypted database token is reused before the credentials row is read again
+TOKEN_CACHE_TTL = float(os.environ.get('GITHUB_TOKEN_CACHE_TTL', 300))
+# Seconds between batched last_used_at writes
+LAST_USED_WRITE_INTERVAL = float(os.environ.get('GITHUB_TOKEN_LAST_USED_INTERVAL', 300))
+
+class TokenProvider(ABC):
+    """Base class: returns a token or None"""
+    name = 'token'
+    anonymous = False  # True when requests may go out without a token
+
+    @abstractmethod
+    def get_token(self) -> Optional[str]:
+        ...
+
+class EnvTokenProvider(TokenProvider):
+    name = 'env'
+
+    def __init__(self, variables: Iterable[str] = ('GITHUB_TOKEN', 'GITHUB_ACCESS_TOKEN',
+                                                   'CONNECTOR_GITHUB_TOKEN', 'REPLIT_GITHUB_TOKEN')):
+        self.variables = tuple(variables)
+
+    def get_token(self) -> Optional[str]:
+        for variable in self.variables:
+            token = os.environ.get(variable)
+            if token:
+                return token
+        return None
+
+class CredentialCache:
+    """
+    Process-wide cache of the active database token
+    Reads hit the database once per TOKEN_CACHE_TTL. Token uses are only noted
+    in memory; a timer thread writes last_used_at for all of them at most once
+    per LAST_USED_WRITE_INTERVAL, on its own connection, so callers never write.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cached: Optional[Tuple[int, str, float]] = None  # (credentials id, token, expires)
+        self._last_used: Dict[int, datetime] = {}
+        self._flush_timer = None
+        self._app = None
+
+    def get_token(self) -> Optional[str]:
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cached
+        if cached is None or cached[2] <= now:
+            credentials = GitHubCredentials.query.filter_by(is_active=True).first()
+            if not credentials:
+                return None
+            cached = (credentials.id, crypto_manager.decrypt(credentials.encrypted_token), now + TOKEN_CACHE_TTL)
+            with self._lock:
+                self._cached = cached
+        self._record_use(cached[0])
+        return cached[1]
+
+    def invalidate(self):
+        """Drop the cached token (credentials were added, rotated or deactivated)"""
+        with self._lock:
+            self._cached = None
+
+    def _record_use(self, credentials_id: int):
+        with self._lock:
+            self._last_used[credentials_id] = datetime.utcnow()
+            if self._flush_timer is None:
+                self._app = current_app._get_current_object()
+                self._flush_timer = threading.Timer(LAST_USED_WRITE_INTERVAL, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def flush(self):
+        """Write the pending last_used_at values in one transaction"""
+        with self._lock:
+            pending, self._last_used = self._last_used, {}
+            self._flush_timer = None
+            app = self._app
+        if not pending or app is None:
+            return
+        try:
+            with app.app_context(), db.engine.begin() as conn:
+                for credentials_id, used_at in pending.items():
+                    conn.execute(update(GitHubCredentials).where(GitHubCredentials.id == credentials_id)
+                                 .values(last_used_at=used_at))
+        except Exception as e:
+            logger.warning(f"Failed to record GitHub token usage: {e}")
+
+_credential_cache = CredentialCache()
+atexit.register(_credential_cache.flush)
+
+def invalidate_credential_cache():
+    _credential_cache.invalidate()
+
+class EncryptedDBTokenProvider(TokenProvider):
+    name = 'database'
+
+    def get_token(self) -> Optional[str]:
+        if crypto_manager is None:
+            return None
+        try:
+            return _credential_cache.get_token()
+        except Exception as e:
+            logger.warning(f"Failed to get token from database: {e}")
+            return None
+
+class ReplitConnectorTokenProvider(TokenProvider):
+    name = 'connector'
+
+    def get_token(self) -> Optional[str]:
+        # Auth token for the Replit connectors API
+        if os.environ.get('REPL_IDENTITY'):
+            x_replit_token = 'repl ' + os.environ['REPL_IDENTITY']
+        elif os.environ.get('WEB_REPL_RENEWAL'):
+            x_replit_token = 'depl ' + os.environ['WEB_REPL_RENEWAL']
+        elif os.environ.get('REPL_IDENTITY_KEY'):
+            x_replit_token = 'repl ' + os.environ['REPL_IDENTITY_KEY']
+        else:
+            return None
+
+        hostname = os.environ.get('CONNECTORS_HOSTNAME', 'connectors.replit.com')
+        try:
+            response = requests.get(
+                f'https://{hostname}/api/v2/connection?include_secrets=true&connector_names=github',
+                headers={'Accept': 'application/json', 'X_REPLIT_TOKEN': x_replit_token},
+                timeout=10
+            )
+            response.raise_for_status()
+            items = response.json().get('items') or []
+            if not items:
+                logger.error('No GitHub connection found in Replit')
+                return None
+
+            settings = items[0].get('settings', {})
+            # Try different possible locations for the access token
+            return (
+                settings.get('access_token') or
+                settings.get('oauth', {}).get('credentials', {}).get('access_token') or
+                settings.get('token')
+            )
+        except Exception as e:
+            logger.error(f'Error getting GitHub token from Replit: {e}')
+            return None
+
+class AnonymousTokenProvider(TokenProvider):
+    name = 'anonymous'
+    anonymous = True
+
+    def get_token(self) -> Optional[str]:
+        return None
+
+class ChainTokenProvider(TokenProvider):
+    name = 'chain'
+
+    def __init__(self, providers: Iterable[TokenProvider]):
+        self.providers = list(providers)
+        self.anonymous = any(provider.anonymous for provider in self.providers)
+
+    def get_token(self) -> Optional[str]:
+        for provider in self.providers:
+            token = provider.get_token()
+            if token:
+                logger.debug(f"GitHub token obtained from {provider.name} provider")
+                return token
+        return None
+
+_default_provider = None
+
+def default_token_provider() -> TokenProvider:
+    """Encrypted database credentials first, then the environment (shared instance)"""
+    global _default_provider
+    if _default_provider is None:
+        _default_provider = ChainTokenProvider([EncryptedDBTokenProvider(), EnvTokenProvider()])
+    return _default_provider
@@ -0,0 +1,254 @@
+"""
+Database-backed job queue
+
+Jobs are rows in the jobs table, so queued work survives restarts and is
+visible to every worker process. enqueue() deduplicates by key against
+pending jobs (a partial unique index allows one per key); a job queued while
+another with its key is running becomes a follow-up that is only claimed once
+the running one finishes, so jobs sharing a key never overlap. JobWorker
+threads claim the highest-priority due job with a conditional UPDATE and run
+its handler in an app context, refreshing locked_at every
+JOB_HEARTBEAT_SECONDS. Failed attempts are retried with exponential backoff
+until max_attempts. A running job whose worker died (no heartbeat for
+JOB_LOCK_TIMEOUT seconds) is reclaimed; the old worker can no longer record
+its outcome.
+"""
+import os
+import json
+import uuid
+import random
+import socket
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+from sqlalchemy import and_, exists, or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased
+from app import app, db
+from models import Job
+
+logger = logging.getLogger(__name__)
+
+WORKER_ENABLED = os.environ.get('JOB_WORKER_ENABLED', '1') != '0'
+POLL_SECONDS = float(os.environ.get('JOB_POLL_SECONDS', 5))
+LOCK_TIMEOUT = timedelta(seconds=int(os.environ.get('JOB_LOCK_TIMEOUT', 1800)))
+# How often a running job's locked_at is refreshed; keep well below JOB_LOCK_TIMEOUT
+HEARTBEAT_SECONDS = float(os.environ.get('JOB_HEARTBEAT_SECONDS', 60))
+RETRY_BASE_SECONDS = float(os.environ.get('JOB_RETRY_BASE_SECONDS', 30))
+
+ACTIVE_STATUSES = ('pending', 'running')
+
+_handlers: Dict[str, Callable[[Dict[str, Any]], Optional[str]]] = {}
+
+class JobError(Exception):
+    """Raised by a handler when the attempt failed and should be retried"""
+    pass
+
+def register_handler(kind: str):
+    """Decorator registering the function that runs jobs of this kind; it returns an optional result message"""
+    def decorator(func):
+        _handlers[kind] = func
+        return func
+    return decorator
+
+def pending_job(dedup_key: str) -> Optional[Job]:
+    return Job.query.filter(Job.dedup_key == dedup_key, Job.status == 'pending').first()
+
+def enqueue(kind: str, payload: Optional[Dict[str, Any]] = None, dedup_key: Optional[str] = None,
+            priority: int = 0, delay: float = 0, max_attempts: int = 3) -> Job:
+    """
+    Queue a job and return it
+    With a dedup_key, an already pending job with that key is returned instead;
+    if one with the key is running, the new job waits for it to finish
+    """
+    if dedup_key:
+        existing = pending_job(dedup_key)
+        if existing:
+            return existing
+
+    job = Job(
+        kind=kind,
+        payload=json.dumps(payload or {}),
+        dedup_key=dedup_key,
+        priority=priority,
+        max_attempts=max_attempts,
+        run_at=datetime.utcnow() + timedelta(seconds=delay),
+    )
+    db.session.add(job)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Another process queued the same key between the check and the insert
+        db.session.rollback()
+        existing = pending_job(dedup_key) if dedup_key else None
+        if existing is None:
+            raise
+        return existing
+
+    logger.info(f"Job {job.id} ({kind}) enfileirado")
+    if delay <= 0:
+        job_worker.wake()
+    return job
+
+def claim_next(worker_id: str) -> Optional[Job]:
+    """Atomically mark the next due job as running for this worker"""
+    now = datetime.utcnow()
+    running = aliased(Job)
+    key_busy = exists().where(running.dedup_key == Job.dedup_key, running.status == 'running',
+                              running.id != Job.id)
+    claimable = or_(
+        and_(Job.status == 'pending', Job.run_at <= now, ~key_busy),
+        and_(Job.status == 'running', Job.locked_at < now - LOCK_TIMEOUT),
+    )
+    for _ in range(5):
+        candidate = db.session.query(Job.id).filter(claimable).order_by(
+            Job.priority.desc(), Job.run_at, Job.id
+        ).first()
+        if candidate is None:
+            return None
+
+        # Only one worker's UPDATE can still match the claimable condition
+        claimed = db.session.execute(
+            update(Job).where(Job.id == candidate.id, claimable).values(
+                status='running', locked_by=worker_id, locked_at=now, attempts=Job.attempts + 1
+            )
+        ).rowcount
+        db.session.commit()
+        if claimed:
+            return db.session.get(Job, candidate.id)
+    return None
+
+def _release(job_id: int, owner: str, **values) -> bool:
+    """Update a running job only if owner still holds it; False when it was reclaimed meanwhile"""
+    released = db.session.execute(
+        update(Job).where(Job.id == job_id, Job.status == 'running', Job.locked_by == owner).values(**values)
+    ).rowcount
+    db.session.commit()
+    if not released:
+        logger.warning(f"Job {job_id} foi retomado por outro worker; resultado descartado")
+    return bool(released)
+
+def _finish(job_id: int, owner: str, status: str, result: Optional[str] = None, error: Optional[str] = None) -> bool:
+    return _release(job_id, owner, status=status, result=result, last_error=error, finished_at=datetime.utcnow())
+
+class _Heartbeat:
+    """Refreshes a running job's locked_at on its own connection until the block exits"""
+
+    def __init__(self, job_id: int, owner: str, interval: float = HEARTBEAT_SECONDS):
+        self.job_id = job_id
+        self.owner = owner
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def __enter__(self):
+        self.engine = db.engine
+        self.thread = threading.Thread(target=self._run, daemon=True, name=f'job-heartbeat-{self.job_id}')
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop_event.set()
+        self.thread.join()
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                with self.engine.begin() as conn:
+                    held = conn.execute(update(Job).where(
+                        Job.id == self.job_id, Job.status == 'running', Job.locked_by == self.owner
+                    ).values(locked_at=datetime.utcnow())).rowcount
+                if not held:
+                    logger.warning(f"Job {self.job_id} não pertence mais a {self.owner}")
+                    return
+            except Exception as e:
+                logger.warning(f"Falha no heartbeat do job {self.job_id}: {e}")
+
+def run_job(job: Job):
+    """Run a claimed job and record success, a scheduled retry, or failure"""
+    # Read before the handler commits: expired attributes would reload another worker's claim
+    job_id, kind, owner, attempts, max_attempts = job.id, job.kind, job.locked_by, job.attempts, job.max_attempts
+    handler = _handlers.get(kind)
+    if handler is None:
+        _finish(job_id, owner, 'failed', error=f'No handler registered for {kind}')
+        return
+    if attempts > max_attempts:
+        # Reclaimed after its worker died too many times
+        _finish(job_id, owner, 'failed', error=job.last_error or 'Worker lost')
+        return
+
+    try:
+        with _Heartbeat(job_id, owner):
+            result = handler(json.loads(job.payload or '{}'))
+    except Exception as e:
+        db.session.rollback()
+        if attempts >= max_attempts:
+            logger.error(f"Job {job_id} ({kind}) falhou definitivamente: {e}")
+            _finish(job_id, owner, 'failed', error=str(e))
+        else:
+            delay = RETRY_BASE_SECONDS * 2 ** (attempts - 1) * random.uniform(0.5, 1.5)
+            logger.warning(f"Job {job_id} ({kind}) falhou (tentativa {attempts}), nova tentativa em {delay:.0f}s: {e}")
+            _release(job_id, owner, status='pending', last_error=str(e), locked_by=None,
+                     run_at=datetime.utcnow() + timedelta(seconds=delay))
+        return
+
+    if _finish(job_id, owner, 'succeeded', result=result):
+        logger.info(f"Job {job_id} ({kind}) concluído")
+
+class JobWorker:
+    """Background thread that claims and runs jobs until stopped"""
+
+    def __init__(self, poll_seconds: float = POLL_SECONDS):
+        self.poll_seconds = poll_seconds
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.thread = None
+        self._wake_event = threading.Event()
+        self._stop_event = threading.Event()
+
+    def start(self):
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self._stop_event.clear()
+        self.thread = threading.Thread(target=self._loop, daemon=True, name='job-worker')
+        self.thread.start()
+        logger.info(f"Job worker iniciado ({self.worker_id})")
+
+    def stop(self, timeout: float = 5):
+        self._stop_event.set()
+        self._wake_event.set()
+        if self.thread:
+            self.thread.join(timeout=timeout)
+
+    def wake(self):
+        """Skip the rest of the poll interval (a job was queued in this process)"""
+        self._wake_event.set()
+
+    def run_once(self) -> bool:
+        """Claim and run one job; returns False when nothing was due"""
+        with app.app_context():
+            job = claim_next(self.worker_id)
+            if job is None:
+                return False
+            run_job(job)
+            return True
+
+    def _loop(self):
+        while not self._stop_event.is_set():
+            try:
+                worked = self.run_once()
+            except Exception as e:
+                logger.error(f"Erro no job worker: {e}")
+                worked = False
+            if not worked:
+                self._wake_event.wait(self.poll_seconds)
+                self._wake_event.clear()
+
+# Global instance
+job_worker = JobWorker()
+
+def start_worker() -> bool:
+    """Start this process's job worker unless JOB_WORKER_ENABLED=0"""
+    if not WORKER_ENABLED:
+        return False
+    job_worker.start()
+    return True
@@ -0,0 +1,153 @@
+"""
+Cross-process leader election
+
+Every worker process can run the same background services; LeaderLease makes
+sure only one of them is active at a time.
+
+- PostgreSQL: a session-level pg_try_advisory_lock held on a dedicated
+  connection. The lock disappears with the connection, so a dead leader is
+  replaced on the next acquire attempt.
+- SQLite: a row in leader_leases claimed inside BEGIN IMMEDIATE (the write lock
+  serializes contenders). The leader renews its expiry; once it stops renewing,
+  any process can take the lease over after lease_seconds.
+"""
+import os
+import socket
+import sqlite3
+import hashlib
+import logging
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import text
+from app import db
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEASE_SECONDS = int(os.environ.get('LEADER_LEASE_SECONDS', 120))
+
+def _advisory_key(name: str) -> int:
+    """Stable signed 64-bit key for pg_try_advisory_lock"""
+    return int.from_bytes(hashlib.sha256(name.encode()).digest()[:8], 'big', signed=True)
+
+class LeaderLease:
+    """Leadership for one named role; call acquire() periodically to renew it"""
+
+    def __init__(self, name: str, lease_seconds: int = DEFAULT_LEASE_SECONDS):
+        self.name = name
+        self.lease_seconds = lease_seconds
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.is_leader = False
+        self._lock = threading.Lock()
+        self._pg_connection = None
+
+    @property
+    def renew_interval(self) -> float:
+        """How often the holder should call acquire() to keep the lease"""
+        return self.lease_seconds / 3
+
+    def acquire(self) -> bool:
+        """Acquire or renew leadership; returns whether this process is the leader"""
+        with self._lock:
+            try:
+                dialect = db.engine.dialect.name
+                if dialect == 'postgresql':
+                    leader = self._acquire_advisory_lock()
+                elif dialect == 'sqlite':
+                    leader = self._acquire_lease_row()
+                else:
+                    leader = True  # No election backend: assume a single process
+            except Exception as e:
+                logger.warning(f"Leader election for {self.name} failed: {e}")
+                leader = False
+
+            if leader != self.is_leader:
+                logger.info(f"{self.holder} {'assumiu' if leader else 'perdeu'} a liderança de {self.name}")
+            self.is_leader = leader
+            return leader
+
+    def release(self):
+        """Give up leadership so another process can take over immediately"""
+        with self._lock:
+            try:
+                if self._pg_connection is not None:
+                    # Pooled connections outlive close(), so unlock explicitly
+                    self._pg_connection.execute(text('SELECT pg_advisory_unlock(:key)'), {'key': _advisory_key(self.name)})
+                    self._pg_connection.close()
+                    self._pg_connection = None
+                elif self.is_leader:
+                    with self._sqlite_connection() as conn:
+                        conn.execute('DELETE FROM leader_leases WHERE name = ? AND holder = ?', (self.name, self.holder))
+            except Exception as e:
+                logger.warning(f"Failed to release leadership of {self.name}: {e}")
+            self.is_leader = False
+
+    # PostgreSQL: session advisory lock on a connection kept checked out while leading.
+    # The connection runs in autocommit so the renewal probe never leaves it idle in
+    # a transaction (which would hold back vacuum and trip idle_in_transaction_session_timeout).
+
+    def _acquire_advisory_lock(self) -> bool:
+        if self._pg_connection is not None:
+            try:
+                self._pg_connection.execute(text('SELECT 1'))
+                return True
+            except Exception:
+                # Connection lost: the server already released the lock. Invalidate it so
+                # a session that still holds the lock is never returned to the pool
+                try:
+                    self._pg_connection.invalidate()
+                    self._pg_connection.close()
+                except Exception:
+                    pass
+                self._pg_connection = None
+
+        connection = db.engine.connect().execution_options(isolation_level='AUTOCOMMIT')
+        acquired = connection.execute(
+            text('SELECT pg_try_advisory_lock(:key)'), {'key': _advisory_key(self.name)}
+        ).scalar()
+        if acquired:
+            self._pg_connection = connection
+            return True
+        connection.close()
+        return False
+
+    # SQLite: lease row claimed under the database write lock
+
+    def _sqlite_connection(self):
+        return _SQLiteLeaseConnection(db.engine.url.database)
+
+    def _acquire_lease_row(self) -> bool:
+        if db.engine.url.database in (None, '', ':memory:'):
+            return True  # Private in-memory database: no other process can compete
+        now = datetime.utcnow()
+        with self._sqlite_connection() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute('SELECT holder, expires_at FROM leader_leases WHERE name = ?', (self.name,)).fetchone()
+            if row and row[0] != self.holder and datetime.fromisoformat(row[1]) > now:
+                conn.execute('ROLLBACK')
+                return False
+
+            expires_at = (now + timedelta(seconds=self.lease_seconds)).isoformat(sep=' ')
+            conn.execute(
+                'INSERT INTO leader_leases (name, holder, expires_at, acquired_at) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT(name) DO UPDATE SET holder = excluded.holder, expires_at = excluded.expires_at, '
+                'acquired_at = CASE WHEN leader_leases.holder = excluded.holder '
+                'THEN leader_leases.acquired_at ELSE excluded.acquired_at END',
+                (self.name, self.holder, expires_at, now.isoformat(sep=' '))
+            )
+            conn.execute('COMMIT')
+            return True
+
+class _SQLiteLeaseConnection:
+    """Autocommit sqlite3 connection so BEGIN IMMEDIATE is issued exactly as written"""
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        return self.conn
+
+    def __exit__(self, *exc):
+        self.conn.close()
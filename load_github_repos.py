@@ -5,14 +5,15 @@ Script to load GitHub repositories using stored encrypted credentials
 import sys
 from app import app, db
 from github_sync import GitHubSyncService
+from github_token_providers import EncryptedDBTokenProvider
 from models import GitHubCredentials
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def load_repositories():
-    """Load GitHub repositories from the authenticated user"""
+def load_repositories(full=False):
+    """Load GitHub repositories from the authenticated user (full=True disables incremental sync)"""
     with app.app_context():
         try:
             # Get stored credentials
@@ -24,16 +25,11 @@ def load_repositories():
             username = credentials.username
             logger.info(f"Loading repositories for user: {username}")
             
-            # Initialize sync service
-            sync_service = GitHubSyncService()
+            # Initialize sync service with the stored credentials
+            sync_service = GitHubSyncService(EncryptedDBTokenProvider())
             
-            # Validate connection first
-            if not sync_service.client.validate_connection():
-                logger.error("GitHub connection validation failed")
-                return False
-            
-            # Sync repositories
-            success, message, repos_synced = sync_service.sync_user_repositories(username)
+            # Sync repositories (the engine validates the connection first)
+            success, message, repos_synced = sync_service.sync_user_repositories(username, full=full)
             
             if success:
                 logger.info(f"Successfully synced {repos_synced} repositories")
@@ -48,5 +44,5 @@ def load_repositories():
             return False
 
 if __name__ == "__main__":
-    success = load_repositories()
+    success = load_repositories(full='--full' in sys.argv)
     sys.exit(0 if success else 1)
\ No newline at end of file
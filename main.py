@@ -1,5 +1,9 @@
 from app import app
 import routes  # noqa: F401
+from startup_tasks import start_server_tasks
+
+# Background work belongs to the serving process, not to scripts importing app
+start_server_tasks()
 
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5000, debug=True)
@@ -1,6 +1,8 @@
+import json
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
+from sqlalchemy.orm import joinedload, selectinload
 from app import db
 
 class User(UserMixin, db.Model):
@@ -39,6 +41,9 @@ class Project(db.Model):
     is_published = db.Column(db.Boolean, default=False)
     is_featured = db.Column(db.Boolean, default=False)
     views_count = db.Column(db.Integer, default=0)
+    # Denormalized counters, kept in sync by the like/comment routes
+    likes_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    comments_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -50,13 +55,33 @@ class Project(db.Model):
     likes = db.relationship('Like', backref='project', lazy=True, cascade='all, delete-orphan')
     tags = db.relationship('Tag', secondary='project_tags', backref='projects')
     
-    @property
-    def likes_count(self):
-        return Like.query.filter_by(project_id=self.id).count()
+    __table_args__ = (
+        # Published listings ordered by recency (index, /projects, search); id breaks
+        # created_at ties for keyset pages, so no sort step is needed on any database
+        db.Index('ix_project_published_created_at_id', 'is_published', 'created_at', 'id'),
+        # Keyset pages of all projects (admin)
+        db.Index('ix_project_created_at_id', 'created_at', 'id'),
+    )
     
-    @property
-    def comments_count(self):
-        return Comment.query.filter_by(project_id=self.id).count()
+    # Named eager-loading profiles: relationship -> loader strategy
+    LOAD_PROFILES = {
+        'card': {'category': joinedload, 'tags': selectinload},
+    }
+    # The detail page shows the same relationships as a card (comments are queried separately)
+    LOAD_PROFILES['detail'] = LOAD_PROFILES['card']
+    
+    @classmethod
+    def load_profile(cls, name):
+        """Return query options for a named eager-loading profile"""
+        return [loader(getattr(cls, relationship))
+                for relationship, loader in cls.LOAD_PROFILES[name].items()]
+    
+    @classmethod
+    def adjust_counter(cls, project_id, counter, delta):
+        """Atomically add delta to a counter column within the current transaction"""
+        column = getattr(cls, counter)
+        db.session.query(cls).filter(cls.id == project_id).update(
+            {column: column + delta}, synchronize_session=False)
 
 class Tag(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -77,6 +102,9 @@ class Comment(db.Model):
     # Foreign Keys
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False)
+    
+    # A project's comments, newest first
+    __table_args__ = (db.Index('ix_comment_project_id_created_at', 'project_id', 'created_at'),)
 
 class Like(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -87,7 +115,11 @@ class Like(db.Model):
     project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False)
     
     # Ensure a user can only like a project once
-    __table_args__ = (db.UniqueConstraint('user_id', 'project_id', name='unique_user_project_like'),)
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'project_id', name='unique_user_project_like'),
+        # Likes by project (the unique constraint leads with user_id)
+        db.Index('ix_like_project_id', 'project_id'),
+    )
 
 class AboutMe(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -127,6 +159,11 @@ class ProjectSkill(db.Model):
     proficiency_used = db.Column(db.Integer, default=5)  # 1-10 how much this skill was used
     is_primary = db.Column(db.Boolean, default=False)  # Main technology used
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_project_skills_project_id', 'project_id'),
+        db.Index('ix_project_skills_skill_id', 'skill_id'),
+    )
 
 class TimelineEvent(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -141,6 +178,9 @@ class TimelineEvent(db.Model):
     event_metadata = db.Column(db.Text)  # JSON for additional data
     is_published = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Published events in date order (/api/timeline)
+    __table_args__ = (db.Index('ix_timeline_event_published_event_date', 'is_published', 'event_date'),)
 
 class Recommendation(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -151,8 +191,17 @@ class Recommendation(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationships
-    source_project = db.relationship('Project', foreign_keys=[source_project_id], backref='generated_recommendations')
-    recommended_project = db.relationship('Project', foreign_keys=[recommended_project_id], backref='received_recommendations')
+    source_project = db.relationship('Project', foreign_keys=[source_project_id],
+                                     backref=db.backref('generated_recommendations', cascade='all, delete-orphan'))
+    recommended_project = db.relationship('Project', foreign_keys=[recommended_project_id],
+                                          backref=db.backref('received_recommendations', cascade='all, delete-orphan'))
+
+class RecommendationRefresh(db.Model):
+    """Watermark of the last recommendation refresh (a single row)"""
+    __tablename__ = 'recommendation_refresh'
+    id = db.Column(db.Integer, primary_key=True)
+    last_run_at = db.Column(db.DateTime, nullable=False)
+    last_full_run_at = db.Column(db.DateTime)
 
 class AdminLog(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -166,6 +215,9 @@ class AdminLog(db.Model):
     # Relationships
     admin_user = db.relationship('User', foreign_keys=[admin_id], backref='admin_logs')
     target_user = db.relationship('User', foreign_keys=[target_user_id], backref='target_logs')
+    
+    # Keyset pages of the admin log, newest first
+    __table_args__ = (db.Index('ix_admin_log_created_at_id', 'created_at', 'id'),)
 
 class GitHubRepository(db.Model):
     __tablename__ = 'github_repositories'
@@ -201,6 +253,13 @@ class GitHubRepository(db.Model):
     # Relationships
     languages = db.relationship('GitHubRepositoryLanguage', backref='repository', lazy=True, cascade='all, delete-orphan')
     
+    __table_args__ = (
+        # Listing order of get_repositories_by_language (scanned backwards for DESC)
+        db.Index('ix_github_repositories_stargazers_pushed_at', 'stargazers_count', 'pushed_at'),
+        # Recently synced repositories on the admin sync page
+        db.Index('ix_github_repositories_last_sync_at', 'last_sync_at'),
+    )
+    
     @property
     def language_list(self):
         try:
@@ -225,8 +284,20 @@ class GitHubRepositoryLanguage(db.Model):
     bytes_count = db.Column(db.Integer, default=0)
     percentage = db.Column(db.Float, default=0.0)
     
-    # Ensure unique repository-language combinations
-    __table_args__ = (db.UniqueConstraint('repository_id', 'language', name='unique_repo_language'),)
+    __table_args__ = (
+        # Ensure unique repository-language combinations
+        db.UniqueConstraint('repository_id', 'language', name='unique_repo_language'),
+        # Language filter on /projects: language -> repository ids without touching the table
+        db.Index('ix_github_repository_languages_language_repository_id', 'language', 'repository_id'),
+    )
+
+class GitHubLanguageFacet(db.Model):
+    """Per-language repository counts, rebuilt after each sync (see github_sync.rebuild_language_facets)"""
+    __tablename__ = 'github_language_facets'
+    language = db.Column(db.String(50), primary_key=True)
+    repository_count = db.Column(db.Integer, nullable=False, default=0)
+    total_bytes = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 class GitHubSyncLog(db.Model):
     __tablename__ = 'github_sync_logs'
@@ -234,15 +305,38 @@ class GitHubSyncLog(db.Model):
     username = db.Column(db.String(100), nullable=False)
     status = db.Column(db.String(20), nullable=False)  # 'success', 'error', 'partial'
     repositories_synced = db.Column(db.Integer, default=0)
+    repositories_skipped = db.Column(db.Integer, default=0)  # Unchanged since the last sync
     error_message = db.Column(db.Text)
+    # GitHub API budget when the sync finished
+    rate_limit_remaining = db.Column(db.Integer)
+    rate_limit_limit = db.Column(db.Integer)
+    rate_limit_reset_at = db.Column(db.DateTime)
+    rate_limit_wait_seconds = db.Column(db.Float, default=0.0)  # Seconds paced or blocked by the rate limit, summed over worker threads
+    # Progress of a running sync, committed periodically by the sync job
+    phase = db.Column(db.String(20))  # 'listing', 'languages', 'writing', 'done'
+    repositories_total = db.Column(db.Integer)
+    repositories_processed = db.Column(db.Integer, default=0)
+    current_repository = db.Column(db.String(200))
+    progress_updated_at = db.Column(db.DateTime)
     started_at = db.Column(db.DateTime, default=datetime.utcnow)
     completed_at = db.Column(db.DateTime)
     
+    # Latest sync per user (status page, scheduler, startup)
+    __table_args__ = (db.Index('ix_github_sync_logs_username_started_at', 'username', 'started_at'),)
+    
     @property
     def duration_seconds(self):
         if self.completed_at and self.started_at:
             return (self.completed_at - self.started_at).total_seconds()
         return None
+    
+    @property
+    def repositories_per_second(self):
+        end = self.completed_at or self.progress_updated_at
+        if not (self.started_at and end and self.repositories_processed):
+            return None
+        elapsed = (end - self.started_at).total_seconds()
+        return self.repositories_processed / elapsed if elapsed > 0 else None
 
 class GitHubCredentials(db.Model):
     __tablename__ = 'github_credentials'
@@ -253,3 +347,42 @@ class GitHubCredentials(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     last_used_at = db.Column(db.DateTime)
+
+class LeaderLease(db.Model):
+    """Leadership lease for background services (SQLite; PostgreSQL uses advisory locks)"""
+    __tablename__ = 'leader_leases'
+    name = db.Column(db.String(100), primary_key=True)
+    holder = db.Column(db.String(200), nullable=False)
+    acquired_at = db.Column(db.DateTime, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+class Job(db.Model):
+    """Background job persisted in the database (see job_queue)"""
+    __tablename__ = 'jobs'
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.Text)  # JSON arguments for the handler
+    dedup_key = db.Column(db.String(200))  # At most one pending job per key; jobs sharing a key never run concurrently
+    status = db.Column(db.String(20), nullable=False, default='pending')  # 'pending', 'running', 'succeeded', 'failed'
+    priority = db.Column(db.Integer, nullable=False, default=0)  # Higher runs first
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_by = db.Column(db.String(200))
+    locked_at = db.Column(db.DateTime)
+    result = db.Column(db.Text)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+    
+    __table_args__ = (
+        db.Index('ix_jobs_status_priority_run_at', 'status', 'priority', 'run_at'),
+        db.Index('uq_jobs_pending_dedup_key', 'dedup_key', unique=True,
+                 sqlite_where=db.text("status = 'pending'"),
+                 postgresql_where=db.text("status = 'pending'")),
+        db.Index('ix_jobs_dedup_key_status', 'dedup_key', 'status'),
+    )
+    
+    @property
+    def payload_data(self):
+        return json.loads(self.payload or '{}')
@@ -0,0 +1,131 @@
+"""
+Full-page cache for anonymous public pages
+
+Pages decorated with @cached_page render the same HTML for every anonymous
+visitor, so the finished response is kept in memory keyed by path, query
+string and language preference. Logged-in users, pending flash messages and
+non-GET requests always go to the view. Each entry carries tags ('projects',
+'categories', 'about', 'github'); writes call invalidate_pages() so this
+process drops the affected pages at once, while other worker processes pick
+the change up when their entries expire after PAGE_CACHE_TTL seconds.
+"""
+import os
+import time
+import threading
+from collections import OrderedDict
+from functools import wraps
+from typing import FrozenSet, Iterable, Optional, Tuple
+from flask import Response, make_response, request, session
+from flask_login import current_user
+
+PAGE_CACHE_ENABLED = os.environ.get('PAGE_CACHE_ENABLED', '1') != '0'
+# Upper bound on how long other processes keep serving a page after a write
+PAGE_CACHE_TTL = float(os.environ.get('PAGE_CACHE_TTL', 60))
+PAGE_CACHE_SIZE = int(os.environ.get('PAGE_CACHE_SIZE', 256))
+
+LANGUAGES = ('pt-BR', 'en')
+DEFAULT_LANGUAGE = 'pt-BR'
+
+# Headers that belong to one visitor's response and must not be replayed
+_PRIVATE_HEADERS = {'set-cookie', 'content-length'}
+
+class PageCache:
+    """Bounded, TTL-limited store of rendered responses with tag invalidation"""
+
+    def __init__(self, ttl: float = PAGE_CACHE_TTL, max_entries: int = PAGE_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, Tuple[bytes, int, list, FrozenSet[str], float]]' = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @property
+    def generation(self) -> int:
+        """Bumped on every invalidation; pass it to set() to discard renders that raced one"""
+        return self._generation
+
+    def get(self, key: str) -> Optional[Response]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            body, status, headers, tags, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        return Response(body, status=status, headers=headers)
+
+    def set(self, key: str, response: Response, tags: Iterable[str], generation: Optional[int] = None):
+        headers = [(name, value) for name, value in response.headers.items()
+                   if name.lower() not in _PRIVATE_HEADERS]
+        entry = (response.get_data(), response.status_code, headers, frozenset(tags),
+                 time.monotonic() + self.ttl)
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_tags(self, *tags: str) -> int:
+        """Drop every page tagged with any of tags; returns how many were dropped"""
+        wanted = set(tags)
+        with self._lock:
+            self._generation += 1
+            stale = [key for key, entry in self._entries.items() if entry[3] & wanted]
+            for key in stale:
+                del self._entries[key]
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+page_cache = PageCache()
+
+def preferred_language() -> str:
+    """Language for the cache key: ?lang=, then a 'language' cookie, then Accept-Language"""
+    for value in (request.args.get('lang'), request.cookies.get('language')):
+        if value in LANGUAGES:
+            return value
+    return request.accept_languages.best_match(LANGUAGES, default=DEFAULT_LANGUAGE)
+
+def cache_key() -> str:
+    query = '&'.join(f'{name}={value}' for name, value in sorted(request.args.items(multi=True)))
+    return f'{request.path}?{query}|{preferred_language()}'
+
+def _cacheable_request() -> bool:
+    return (PAGE_CACHE_ENABLED
+            and request.method in ('GET', 'HEAD')
+            and not current_user.is_authenticated
+            and not session.get('_flashes'))
+
+def cached_page(*tags: str):
+    """Serve the view from page_cache for anonymous visitors; tags name the data the page shows"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not _cacheable_request():
+                return view(*args, **kwargs)
+
+            key = cache_key()
+            cached = page_cache.get(key)
+            if cached is not None:
+                cached.headers['X-Page-Cache'] = 'HIT'
+                return cached
+
+            generation = page_cache.generation
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200 and not response.direct_passthrough:
+                page_cache.set(key, response, tags, generation)
+            response.headers['X-Page-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
+
+def invalidate_pages(*tags: str) -> int:
+    """Drop cached pages showing any of tags (call after committing the write)"""
+    return page_cache.invalidate_tags(*tags)
@@ -0,0 +1,146 @@
+"""
+Keyset (seek) pagination for newest-first listings
+
+Instead of OFFSET plus COUNT(*), a page is the next per_page rows after the
+boundary row of the previous page, ordered by (created_at DESC, id DESC). The
+boundary is a row-value comparison, (created_at, id) < (x, y), so with an
+index ending in (created_at, id) each page is one index range scan read in
+order: deep pages cost the same as the first one. Positions travel as opaque URL-safe cursor tokens; an invalid
+or stale cursor just yields the first page.
+"""
+import os
+import json
+import time
+import base64
+import binascii
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import func, text, tuple_
+from app import db
+
+# Seconds an exact row count is reused where no planner estimate is available
+COUNT_CACHE_TTL = float(os.environ.get('PAGINATION_COUNT_CACHE_TTL', 60))
+
+_counts: Dict[str, Tuple[int, float]] = {}
+_counts_lock = threading.Lock()
+
+class KeysetPage:
+    """One page of results; next_args/prev_args are url_for() arguments for the neighbour pages"""
+
+    def __init__(self, items: List[Any], next_args: Optional[Dict[str, Any]] = None,
+                 prev_args: Optional[Dict[str, Any]] = None, total: Optional[int] = None,
+                 total_is_approximate: bool = False):
+        self.items = items
+        self.next_args = next_args
+        self.prev_args = prev_args
+        self.total = total
+        self.total_is_approximate = total_is_approximate
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_args is not None
+
+    @property
+    def has_prev(self) -> bool:
+        return self.prev_args is not None
+
+def encode_cursor(row, direction: str) -> str:
+    """Token for the position of row; direction is 'next' (rows after it) or 'prev' (rows before it)"""
+    payload = json.dumps([row.created_at.isoformat(), row.id, direction[0]], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def decode_cursor(token: Optional[str]) -> Optional[Tuple[datetime, int, str]]:
+    """(created_at, id, 'next' | 'prev') from a cursor token, or None when missing or malformed"""
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        created_at, row_id, direction = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(row_id), {'n': 'next', 'p': 'prev'}[direction]
+    except (ValueError, TypeError, KeyError, binascii.Error):
+        return None
+
+def older_than(query, model, created_at: datetime, row_id: int):
+    """Rows after the (created_at, id) position in newest-first order"""
+    return query.filter(tuple_(model.created_at, model.id) < (created_at, row_id)).order_by(
+        model.created_at.desc(), model.id.desc())
+
+def keyset_paginate(query, model, per_page: int, cursor: Optional[str] = None,
+                    total: Optional[int] = None, total_is_approximate: bool = False) -> KeysetPage:
+    """
+    Page through query newest first on (model.created_at, model.id)
+    query must not be ordered yet; rows need a non-null created_at
+    """
+    position = decode_cursor(cursor)
+
+    if position is not None:
+        created_at, row_id, direction = position
+        if direction == 'next':
+            rows = older_than(query, model, created_at, row_id).limit(per_page + 1).all()
+            items = rows[:per_page]
+            if items:
+                return KeysetPage(
+                    items,
+                    next_args={'cursor': encode_cursor(items[-1], 'next')} if len(rows) > per_page else None,
+                    prev_args={'cursor': encode_cursor(items[0], 'prev')},
+                    total=total, total_is_approximate=total_is_approximate,
+                )
+        else:
+            # Walk backwards (oldest first) and flip the rows back into display order
+            rows = query.filter(tuple_(model.created_at, model.id) > (created_at, row_id)).order_by(
+                model.created_at, model.id).limit(per_page + 1).all()
+            if len(rows) > per_page:
+                items = list(reversed(rows[:per_page]))
+                return KeysetPage(
+                    items,
+                    next_args={'cursor': encode_cursor(items[-1], 'next')},
+                    prev_args={'cursor': encode_cursor(items[0], 'prev')},
+                    total=total, total_is_approximate=total_is_approximate,
+                )
+        # Reached either end (or a stale cursor): show a full first page
+
+    rows = query.order_by(model.created_at.desc(), model.id.desc()).limit(per_page + 1).all()
+    items = rows[:per_page]
+    return KeysetPage(
+        items,
+        next_args={'cursor': encode_cursor(items[-1], 'next')} if len(rows) > per_page else None,
+        total=total, total_is_approximate=total_is_approximate,
+    )
+
+def offset_page(query, page: int, per_page: int) -> KeysetPage:
+    """
+    Numbered page of an already ordered query (e.g. relevance-ranked search)
+    Fetches one extra row to know whether there is a next page instead of counting
+    """
+    page = max(page, 1)
+    rows = query.offset((page - 1) * per_page).limit(per_page + 1).all()
+    return KeysetPage(
+        rows[:per_page],
+        next_args={'page': page + 1} if len(rows) > per_page else None,
+        prev_args={'page': page - 1} if page > 1 else None,
+    )
+
+def approximate_count(model) -> int:
+    """
+    Row count of model's table for display
+    PostgreSQL: the planner's estimate (free); elsewhere an exact COUNT(*)
+    reused for COUNT_CACHE_TTL seconds
+    """
+    table = model.__table__.name
+    if db.engine.dialect.name == 'postgresql':
+        estimate = db.session.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE relname = :table AND relkind = 'r'"), {'table': table}
+        ).scalar()
+        if estimate is not None and estimate >= 0:  # -1 until the table is first analyzed
+            return int(estimate)
+
+    now = time.monotonic()
+    with _counts_lock:
+        cached = _counts.get(table)
+        if cached and cached[1] > now:
+            return cached[0]
+    count = db.session.query(func.count(model.id)).scalar()
+    with _counts_lock:
+        _counts[table] = (count, now + COUNT_CACHE_TTL)
+    return count
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Query plan checks for the hot read paths
+
+Each check builds a query the app runs on most requests and EXPLAINs it on
+the configured database (EXPLAIN QUERY PLAN on SQLite, EXPLAIN on
+PostgreSQL). A check fails when the plan scans a listed table in full, sorts
+a result that should come out of an index in order, or doesn't use any of
+the indexes it expects. PostgreSQL happily seq-scans (or bitmap-scans and
+sorts) tiny tables, so the checks run with enable_seqscan and enable_sort
+off: they ask whether an index *can* serve the query in order, not what the
+planner picks for today's row counts.
+
+Run after changing models.py indexes:
+
+    python query_plans.py
+"""
+import re
+import sys
+import logging
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+from sqlalchemy import desc, func, text
+from app import app, db
+from models import AdminLog, Comment, GitHubRepository, GitHubSyncLog, Like, Project, ProjectSkill, TimelineEvent
+from github_sync import repositories_by_language_query
+from pagination import older_than
+
+logger = logging.getLogger(__name__)
+
+_checks: List[Dict] = []
+
+def plan_check(name: str, tables: Iterable[str] = (), indexes: Iterable[str] = (), ordered: bool = False):
+    """
+    Register a function returning the query to EXPLAIN
+    tables: must not be scanned in full; indexes: at least one must appear in
+    the plan; ordered: the ORDER BY must be satisfied without a sort step
+    """
+    def decorator(func: Callable):
+        _checks.append({'name': name, 'query': func, 'tables': tuple(tables),
+                        'indexes': tuple(indexes), 'ordered': ordered})
+        return func
+    return decorator
+
+def explain(statement) -> List[str]:
+    """Plan lines for a Query or Core statement on the current database"""
+    if hasattr(statement, 'statement'):
+        statement = statement.statement
+    sql = str(statement.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True}))
+    dialect = db.engine.dialect.name
+    with db.engine.connect() as conn:
+        if dialect == 'sqlite':
+            return [row[-1] for row in conn.execute(text(f'EXPLAIN QUERY PLAN {sql}'))]
+        if dialect == 'postgresql':
+            conn.execute(text('SET LOCAL enable_seqscan = off'))
+            conn.execute(text('SET LOCAL enable_sort = off'))
+            plan = [row[0] for row in conn.execute(text(f'EXPLAIN {sql}'))]
+            conn.rollback()
+            return plan
+    raise ValueError(f'No EXPLAIN support for {dialect}')
+
+def _full_scans(plan: List[str]) -> List[str]:
+    if db.engine.dialect.name == 'sqlite':
+        pattern = re.compile(r'^SCAN (\w+)(?: AS \w+)?$')
+    else:
+        pattern = re.compile(r'Seq Scan on (\w+)')
+    return [match.group(1) for match in (pattern.search(line.strip()) for line in plan) if match]
+
+def _sorts(plan: List[str]) -> bool:
+    if db.engine.dialect.name == 'sqlite':
+        return any('USE TEMP B-TREE FOR ORDER BY' in line for line in plan)
+    return any(re.search(r'(^|->\s+)(Incremental )?Sort\b', line.strip()) for line in plan)
+
+def check_query_plans(names: Optional[Iterable[str]] = None) -> List[Dict]:
+    """Run the registered checks (or just `names`); each result has name, ok, problems and plan"""
+    results = []
+    for check in _checks:
+        if names and check['name'] not in names:
+            continue
+        plan = explain(check['query']())
+        plan_text = '\n'.join(plan)
+        problems = [f'full scan of {table}' for table in _full_scans(plan) if table in check['tables']]
+        if check['ordered'] and _sorts(plan):
+            problems.append('sorts instead of reading an index in order')
+        if check['indexes'] and not any(index in plan_text for index in check['indexes']):
+            problems.append(f"none of {', '.join(check['indexes'])} used")
+        results.append({'name': check['name'], 'ok': not problems, 'problems': problems, 'plan': plan})
+    return results
+
+# Public pages: index, project_detail, /api/skills, /api/timeline
+
+@plan_check('index_recent_projects', tables=['project'],
+            indexes=['ix_project_published_created_at_id'], ordered=True)
+def _index_recent_projects():
+    return Project.query.options(*Project.load_profile('card')).filter_by(is_published=True).order_by(
+        desc(Project.created_at)).limit(6)
+
+@plan_check('index_featured_projects', tables=['project'], indexes=['ix_project_published_created_at_id'])
+def _index_featured_projects():
+    return Project.query.options(*Project.load_profile('card')).filter_by(is_published=True, is_featured=True).limit(3)
+
+@plan_check('project_comments', tables=['comment'],
+            indexes=['ix_comment_project_id_created_at'], ordered=True)
+def _project_comments():
+    return Comment.query.filter_by(project_id=1).order_by(desc(Comment.created_at))
+
+@plan_check('project_user_like', tables=['like'])
+def _project_user_like():
+    return Like.query.filter_by(user_id=1, project_id=1).limit(1)
+
+@plan_check('project_likes', tables=['like'], indexes=['ix_like_project_id'])
+def _project_likes():
+    return db.session.query(func.count(Like.id)).filter(Like.project_id == 1)
+
+@plan_check('skill_projects_count', tables=['project_skills'], indexes=['ix_project_skills_skill_id'])
+def _skill_projects_count():
+    return db.session.query(func.count(ProjectSkill.id)).filter(ProjectSkill.skill_id == 1)
+
+@plan_check('skill_projects', tables=['project_skills'], indexes=['ix_project_skills_skill_id'])
+def _skill_projects():
+    return db.session.query(Project).join(ProjectSkill).filter(ProjectSkill.skill_id == 1)
+
+@plan_check('project_skills', tables=['project_skills'], indexes=['ix_project_skills_project_id'])
+def _project_skills():
+    return ProjectSkill.query.filter_by(project_id=1)
+
+@plan_check('timeline_events', tables=['timeline_event'],
+            indexes=['ix_timeline_event_published_event_date'], ordered=True)
+def _timeline_events():
+    return TimelineEvent.query.filter_by(is_published=True).order_by(TimelineEvent.event_date)
+
+# Keyset pages (pagination.keyset_paginate) past a cursor
+
+@plan_check('projects_keyset_page', tables=['project'],
+            indexes=['ix_project_published_created_at_id'], ordered=True)
+def _projects_keyset_page():
+    published = Project.query.options(*Project.load_profile('card')).filter_by(is_published=True)
+    return older_than(published, Project, datetime(2024, 1, 1), 100).limit(7)
+
+@plan_check('admin_projects_keyset_page', tables=['project'], indexes=['ix_project_created_at_id'], ordered=True)
+def _admin_projects_keyset_page():
+    return older_than(Project.query, Project, datetime(2024, 1, 1), 100).limit(11)
+
+@plan_check('admin_logs_keyset_page', tables=['admin_log'], indexes=['ix_admin_log_created_at_id'], ordered=True)
+def _admin_logs_keyset_page():
+    return older_than(AdminLog.query, AdminLog, datetime(2024, 1, 1), 100).limit(51)
+
+# GitHub repository listing
+
+@plan_check('repositories_by_language', tables=['github_repository_languages'],
+            indexes=['ix_github_repository_languages_language_repository_id'])
+def _repositories_by_language():
+    return repositories_by_language_query('Python').limit(20)
+
+@plan_check('repositories_by_stars', tables=['github_repositories'],
+            indexes=['ix_github_repositories_stargazers_pushed_at'], ordered=True)
+def _repositories_by_stars():
+    return repositories_by_language_query().limit(20)
+
+@plan_check('recently_synced_repositories', tables=['github_repositories'],
+            indexes=['ix_github_repositories_last_sync_at'], ordered=True)
+def _recently_synced_repositories():
+    return GitHubRepository.query.order_by(desc(GitHubRepository.last_sync_at)).limit(10)
+
+@plan_check('latest_sync_log', tables=['github_sync_logs'],
+            indexes=['ix_github_sync_logs_username_started_at'], ordered=True)
+def _latest_sync_log():
+    return GitHubSyncLog.query.filter_by(username='octocat').order_by(GitHubSyncLog.started_at.desc()).limit(1)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    with app.app_context():
+        results = check_query_plans(sys.argv[1:] or None)
+    for result in results:
+        print(f"{'✅' if result['ok'] else '❌'} {result['name']}")
+        for problem in result['problems']:
+            print(f"   - {problem}")
+        if not result['ok']:
+            for line in result['plan']:
+                print(f"     {line}")
+    sys.exit(0 if all(result['ok'] for result in results) else 1)
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Precomputed project recommendations
+
+refresh_recommendations() fills the Recommendation table with tag, category
+and content (TF-IDF cosine) scores for the best matches of every published
+project. Incremental runs only recompute pairs involving projects updated
+since the previous run (recorded in RecommendationRefresh).
+/api/recommendations reads the stored rows instead of scoring on every call.
+schedule_refresh() queues the refresh on the job queue under a single dedup
+key, so runs from different worker processes never overlap.
+"""
+import re
+import sys
+import json
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import func, insert, or_
+from sqlalchemy.orm import selectinload
+from app import app, db
+from models import Project, Recommendation, RecommendationRefresh
+from job_queue import enqueue, register_handler
+
+logger = logging.getLogger(__name__)
+
+# Content similarity uses the TF-IDF engine when NumPy/SciPy are installed
+try:
+    from tfidf_engine import TfidfIndex
+except ImportError:
+    TfidfIndex = None
+    logging.warning("numpy/scipy não disponíveis - usando similaridade por palavras em comum")
+
+TAG_WEIGHT = 0.4
+CATEGORY_WEIGHT = 0.3
+CONTENT_WEIGHT = 0.3
+CONTENT_THRESHOLD = 0.1  # Only keep content matches with > 10% similarity
+MAX_RECOMMENDATIONS = 20  # Stored recommended projects per source project
+
+def _tokenize(text_value: str) -> set:
+    return set(re.findall(r'\w+', (text_value or '').lower()))
+
+def _project_features(project: Project) -> Dict:
+    return {
+        'tags': {tag.name for tag in project.tags},
+        'category_id': project.category_id,
+        'description_words': _tokenize(project.description),
+        'document_words': _tokenize((project.description or '') + ' ' + (project.content or '')),
+    }
+
+def _word_overlap_scores(features: Dict[int, Dict], sources: Iterable[int]) -> Dict[Tuple[int, int], float]:
+    """Fallback content score: shared description words, pairwise"""
+    scores = {}
+    for source_id in sources:
+        description_words = features[source_id]['description_words']
+        if not description_words:
+            continue
+        for candidate_id, candidate in features.items():
+            if candidate_id == source_id:
+                continue
+            common_words = description_words & candidate['document_words']
+            if common_words:
+                score = len(common_words) / max(len(description_words), len(candidate['document_words']))
+                if score > CONTENT_THRESHOLD:
+                    scores[(source_id, candidate_id)] = score
+    return scores
+
+def _content_scores(published: List[Project], features: Dict[int, Dict],
+                    changed_ids: Optional[set]) -> Dict[Tuple[int, int], float]:
+    """
+    Cosine similarity for (source, candidate) pairs above CONTENT_THRESHOLD
+
+    Full runs take the top matches of every project. Incremental runs score the
+    changed projects against everything, in both directions (cosine is symmetric).
+    """
+    sources = list(features) if changed_ids is None else [pid for pid in changed_ids if pid in features]
+    if TfidfIndex is None:
+        scores = _word_overlap_scores(features, sources)
+        if changed_ids is not None:
+            unchanged = [pid for pid in features if pid not in changed_ids]
+            scores.update({pair: score for pair, score in _word_overlap_scores(features, unchanged).items()
+                           if pair[1] in changed_ids})
+        return scores
+
+    index = TfidfIndex.from_projects(published)
+    scores = {}
+    for source_id in sources:
+        for candidate_id, score in index.top_k(source_id, MAX_RECOMMENDATIONS, CONTENT_THRESHOLD):
+            scores[(source_id, candidate_id)] = score
+        if changed_ids is not None:
+            similarities = index.similarities(source_id)
+            for row in (similarities > CONTENT_THRESHOLD).nonzero()[0]:
+                candidate_id = int(index.ids[row])
+                if candidate_id != source_id:
+                    scores.setdefault((candidate_id, source_id), float(similarities[row]))
+    return scores
+
+def _candidate_scores(source_id: int, features: Dict[int, Dict], tag_index: Dict[str, set],
+                      category_index: Dict[int, set], content: Dict[int, float],
+                      allowed: Optional[set]) -> Dict[int, List[Tuple[str, float]]]:
+    """Typed scores for every candidate sharing a tag, category or content with the source"""
+    source = features[source_id]
+    candidates = set(content)
+    for tag in source['tags']:
+        candidates |= tag_index[tag]
+    if source['category_id']:
+        candidates |= category_index[source['category_id']]
+    candidates.discard(source_id)
+    if allowed is not None:
+        candidates &= allowed
+
+    scored = {}
+    for candidate_id in candidates:
+        candidate = features[candidate_id]
+        scores = []
+        common_tags = source['tags'] & candidate['tags']
+        if common_tags:
+            scores.append(('tag', len(common_tags) / len(source['tags']) * TAG_WEIGHT))
+        if source['category_id'] and source['category_id'] == candidate['category_id']:
+            scores.append(('category', CATEGORY_WEIGHT))
+        if candidate_id in content:
+            scores.append(('content', content[candidate_id] * CONTENT_WEIGHT))
+        if scores:
+            scored[candidate_id] = scores
+    return scored
+
+def _trim_sources(source_ids: Iterable[int]):
+    """Drop stored candidates beyond the best MAX_RECOMMENDATIONS (by combined score) of each source"""
+    totals: Dict[int, Dict[int, float]] = defaultdict(lambda: defaultdict(float))
+    for source_id, candidate_id, score in db.session.query(
+        Recommendation.source_project_id, Recommendation.recommended_project_id, Recommendation.similarity_score
+    ).filter(Recommendation.source_project_id.in_(list(source_ids))):
+        totals[source_id][candidate_id] += score or 0.0
+
+    for source_id, candidates in totals.items():
+        ranked = sorted(candidates, key=candidates.get, reverse=True)
+        dropped = ranked[MAX_RECOMMENDATIONS:]
+        if dropped:
+            Recommendation.query.filter(
+                Recommendation.source_project_id == source_id,
+                Recommendation.recommended_project_id.in_(dropped)
+            ).delete(synchronize_session=False)
+
+def refresh_recommendations(full: bool = False) -> int:
+    """
+    Recompute stored recommendations
+    Returns the number of recommendation rows written
+
+    Incremental runs keep the IDF weights of unchanged pairs; run with
+    full=True periodically to renormalize against the whole corpus.
+    """
+    run_started = datetime.utcnow()
+    state = RecommendationRefresh.query.first()
+    if state is None:
+        state = RecommendationRefresh(last_run_at=run_started)
+        db.session.add(state)
+        full = True
+    last_run = state.last_run_at
+    state.last_run_at = run_started
+
+    if full:
+        changed_ids = None
+        state.last_full_run_at = run_started
+        Recommendation.query.delete(synchronize_session=False)
+    else:
+        changed_ids = {project_id for (project_id,) in db.session.query(Project.id).filter(
+            Project.updated_at >= last_run
+        )}
+        if not changed_ids:
+            db.session.commit()
+            return 0
+        Recommendation.query.filter(or_(
+            Recommendation.source_project_id.in_(changed_ids),
+            Recommendation.recommended_project_id.in_(changed_ids)
+        )).delete(synchronize_session=False)
+
+    published = Project.query.options(selectinload(Project.tags)).filter_by(is_published=True).all()
+    features = {project.id: _project_features(project) for project in published}
+
+    tag_index: Dict[str, set] = defaultdict(set)
+    category_index: Dict[int, set] = defaultdict(set)
+    for project_id, project_features in features.items():
+        for tag in project_features['tags']:
+            tag_index[tag].add(project_id)
+        if project_features['category_id']:
+            category_index[project_features['category_id']].add(project_id)
+
+    content_by_source: Dict[int, Dict[int, float]] = defaultdict(dict)
+    for (source_id, candidate_id), score in _content_scores(published, features, changed_ids).items():
+        content_by_source[source_id][candidate_id] = score
+
+    rows = []
+    for source_id in features:
+        # Unchanged sources only need their pairs with changed projects rewritten
+        allowed = None if changed_ids is None or source_id in changed_ids else changed_ids
+        scored = _candidate_scores(source_id, features, tag_index, category_index,
+                                   content_by_source.get(source_id, {}), allowed)
+        best = sorted(scored.items(), key=lambda item: sum(score for _, score in item[1]), reverse=True)
+        for candidate_id, scores in best[:MAX_RECOMMENDATIONS]:
+            for recommendation_type, score in scores:
+                rows.append({
+                    'source_project_id': source_id,
+                    'recommended_project_id': candidate_id,
+                    'similarity_score': score,
+                    'recommendation_type': recommendation_type,
+                    'created_at': run_started,
+                })
+
+    if rows:
+        db.session.execute(insert(Recommendation), rows)
+    if changed_ids is not None:
+        # Unchanged sources kept their stored matches and may have gained new ones
+        _trim_sources({row['source_project_id'] for row in rows} - changed_ids)
+    db.session.commit()
+
+    logger.info(f"Recommendations refreshed ({'full' if full else f'{len(changed_ids)} changed projects'}): "
+                f"{len(rows)} rows written")
+    return len(rows)
+
+def get_top_recommendations(project_id: int, limit: int = 3) -> List[Dict]:
+    """Return the top-N stored recommendations for a project with combined scores"""
+    total_score = func.sum(Recommendation.similarity_score).label('score')
+    top = db.session.query(
+        Recommendation.recommended_project_id, total_score
+    ).join(
+        Project, Project.id == Recommendation.recommended_project_id
+    ).filter(
+        Recommendation.source_project_id == project_id,
+        Project.is_published == True
+    ).group_by(
+        Recommendation.recommended_project_id
+    ).order_by(total_score.desc()).limit(limit).all()
+
+    if not top:
+        return []
+
+    top_ids = [recommended_id for recommended_id, _ in top]
+    projects = {project.id: project for project in
+                Project.query.options(*Project.load_profile('card')).filter(Project.id.in_(top_ids))}
+
+    types: Dict[int, List[str]] = {}
+    for recommended_id, recommendation_type in db.session.query(
+        Recommendation.recommended_project_id, Recommendation.recommendation_type
+    ).filter(
+        Recommendation.source_project_id == project_id,
+        Recommendation.recommended_project_id.in_(top_ids)
+    ):
+        types.setdefault(recommended_id, []).append(recommendation_type)
+
+    return [
+        {'project': projects[recommended_id], 'score': score, 'types': types.get(recommended_id, [])}
+        for recommended_id, score in top if recommended_id in projects
+    ]
+
+# Background refresh on the job queue: one pending job at a time, never two running
+REFRESH_DEDUP_KEY = 'recommendations-refresh'
+
+@register_handler('recommendations_refresh')
+def refresh_recommendations_job(payload: Dict) -> Optional[str]:
+    written = refresh_recommendations(full=payload.get('full', False))
+    return f"{written} recommendation rows written"
+
+def schedule_refresh(full: bool = False):
+    """Queue a recommendation refresh; an already queued one is reused (upgraded to full if asked)"""
+    job = enqueue('recommendations_refresh', {'full': full}, dedup_key=REFRESH_DEDUP_KEY)
+    if full and job.status == 'pending' and not job.payload_data.get('full'):
+        job.payload = json.dumps({'full': True})
+        db.session.commit()
+    return job
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    with app.app_context():
+        try:
+            written = refresh_recommendations(full='--full' in sys.argv)
+            print(f"✅ {written} recommendation rows written")
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error refreshing recommendations: {e}")
+            sys.exit(1)
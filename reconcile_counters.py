@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Repair drift in the denormalized Project.likes_count / comments_count columns
+"""
+import sys
+import logging
+from sqlalchemy import func, or_
+from app import app, db
+from models import Project, Like, Comment
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def reconcile_project_counters() -> int:
+    """
+    Recompute the stored counters from the like/comment tables
+    Returns the number of projects whose counters had drifted
+    """
+    likes_subquery = db.session.query(func.count(Like.id)).filter(
+        Like.project_id == Project.id
+    ).correlate(Project).scalar_subquery()
+    comments_subquery = db.session.query(func.count(Comment.id)).filter(
+        Comment.project_id == Project.id
+    ).correlate(Project).scalar_subquery()
+
+    drift_filter = or_(
+        Project.likes_count != likes_subquery,
+        Project.comments_count != comments_subquery
+    )
+    drifted = Project.query.filter(drift_filter).count()
+
+    if drifted:
+        db.session.query(Project).filter(drift_filter).update({
+            Project.likes_count: likes_subquery,
+            Project.comments_count: comments_subquery
+        }, synchronize_session=False)
+        db.session.commit()
+
+    return drifted
+
+if __name__ == "__main__":
+    with app.app_context():
+        try:
+            drifted = reconcile_project_counters()
+            logger.info(f"Counters reconciled: {drifted} project(s) corrected")
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error reconciling counters: {e}")
+            sys.exit(1)
@@ -1,43 +1,63 @@
 import os
+from datetime import datetime
+from types import SimpleNamespace
 from flask import render_template, url_for, flash, redirect, request, jsonify, abort
 from flask_login import login_user, current_user, logout_user, login_required
 from werkzeug.security import generate_password_hash, check_password_hash
 from sqlalchemy import or_, desc
 from app import app, db
-from models import User, Project, Category, Comment, Like, Tag, AboutMe, project_tags, GitHubRepository, GitHubRepositoryLanguage
+from models import User, Project, Category, Comment, Like, Tag, AboutMe, project_tags, GitHubRepository, GitHubRepositoryLanguage, GitHubCredentials
 from forms import LoginForm, RegisterForm, ProjectForm, CategoryForm, CommentForm, SearchForm, AboutMeForm, UserPromoteForm, UserDemoteForm, UserActivateForm, UserDeactivateForm
 from utils import save_picture, delete_picture, parse_tags, admin_required, super_admin_required, log_admin_action
 from github_sync import GitHubSyncService
+from github_jobs import PRIORITY_MANUAL, enqueue_github_sync, active_sync_jobs, github_sync_status
+from view_counter import view_counter
+from snapshot_cache import SnapshotCache
+from search_index import search_projects, highlight_snippets
+from recommendations import schedule_refresh as schedule_recommendation_refresh
+from pagination import keyset_paginate, offset_page, approximate_count
+from page_cache import cached_page, invalidate_pages
+
+def _load_about_me_snapshot():
+    """Copy the AboutMe row into a plain object that outlives the session"""
+    about_me = AboutMe.query.first()
+    if not about_me:
+        return None
+    return SimpleNamespace(**{column.name: getattr(about_me, column.name)
+                              for column in AboutMe.__table__.columns})
+
+about_me_cache = SnapshotCache(_load_about_me_snapshot)
 
 @app.context_processor
 def inject_about_me():
     """Make AboutMe data available to all templates"""
-    about_me = AboutMe.query.first()
-    return dict(about_me=about_me)
+    return dict(about_me=about_me_cache.get())
 
 # Public routes
 @app.route('/')
+@cached_page('projects', 'categories', 'about')
 def index():
     search_form = SearchForm()
-    featured_projects = Project.query.filter_by(is_published=True, is_featured=True).limit(3).all()
-    recent_projects = Project.query.filter_by(is_published=True).order_by(desc(Project.created_at)).limit(6).all()
+    card = Project.load_profile('card')
+    featured_projects = Project.query.options(*card).filter_by(is_published=True, is_featured=True).limit(3).all()
+    recent_projects = Project.query.options(*card).filter_by(is_published=True).order_by(desc(Project.created_at)).limit(6).all()
     return render_template('index.html', featured_projects=featured_projects, 
                          recent_projects=recent_projects, search_form=search_form)
 
 @app.route('/projects')
+@cached_page('projects', 'categories', 'github', 'about')
 def projects():
     search_form = SearchForm()
-    page = request.args.get('page', 1, type=int)
+    cursor = request.args.get('cursor')
     category_id = request.args.get('category', type=int)
     language = request.args.get('language', type=str)
     
     # Get CMS projects
-    cms_query = Project.query.filter_by(is_published=True)
+    cms_query = Project.query.options(*Project.load_profile('card')).filter_by(is_published=True)
     if category_id:
         cms_query = cms_query.filter_by(category_id=category_id)
     
-    cms_projects = cms_query.order_by(desc(Project.created_at)).paginate(
-        page=page, per_page=6, error_out=False)
+    cms_projects = keyset_paginate(cms_query, Project, per_page=6, cursor=cursor)
     
     # Get GitHub repositories (with error handling)
     github_repos = []
@@ -64,11 +84,11 @@ def projects():
 @app.route('/project/<int:id>')
 def project_detail(id):
     search_form = SearchForm()
-    project = Project.query.get_or_404(id)
+    project = Project.query.options(*Project.load_profile('detail')).get_or_404(id)
     
-    # Increment view count
-    project.views_count += 1
-    db.session.commit()
+    # Buffer the view; increments are written to the project row in batches
+    views_count = (project.views_count or 0) + view_counter.pending(id) + 1
+    view_counter.record(id)
     
     comment_form = CommentForm()
     comments = Comment.query.filter_by(project_id=id).order_by(desc(Comment.created_at)).all()
@@ -80,9 +100,11 @@ def project_detail(id):
     
     return render_template('portfolio/project_detail.html', project=project, 
                          comment_form=comment_form, comments=comments, 
-                         user_liked=user_liked, search_form=search_form)
+                         user_liked=user_liked, views_count=views_count,
+                         search_form=search_form)
 
 @app.route('/about')
+@cached_page('about')
 def about():
     search_form = SearchForm()
     return render_template('portfolio/about.html', search_form=search_form)
@@ -93,21 +115,29 @@ def search():
     query = request.args.get('query', '')
     page = request.args.get('page', 1, type=int)
     
+    card = Project.load_profile('card')
+    snippets = {}
     if query:
-        projects = Project.query.filter(
-            Project.is_published == True,
-            or_(
-                Project.title.contains(query),
-                Project.description.contains(query),
-                Project.content.contains(query)
-            )
-        ).order_by(desc(Project.created_at)).paginate(
-            page=page, per_page=6, error_out=False)
+        published = Project.query.options(*card).filter(Project.is_published == True)
+        ranked = search_projects(published, query)
+        if ranked is not None:
+            # Relevance order has no (created_at, id) key: numbered pages without a COUNT
+            projects = offset_page(ranked, page, per_page=6)
+            snippets = highlight_snippets([project.id for project in projects.items], query)
+        else:
+            projects = keyset_paginate(published.filter(
+                or_(
+                    Project.title.contains(query),
+                    Project.description.contains(query),
+                    Project.content.contains(query)
+                )
+            ), Project, per_page=6, cursor=request.args.get('cursor'))
     else:
-        projects = Project.query.filter_by(is_published=True).paginate(
-            page=page, per_page=6, error_out=False)
+        projects = keyset_paginate(Project.query.options(*card).filter_by(is_published=True),
+                                   Project, per_page=6, cursor=request.args.get('cursor'))
     
-    return render_template('search.html', projects=projects, query=query, search_form=search_form)
+    return render_template('search.html', projects=projects, query=query,
+                         snippets=snippets, search_form=search_form)
 
 # Authentication routes
 @app.route('/login', methods=['GET', 'POST'])
@@ -177,6 +207,7 @@ def add_comment(project_id):
             project_id=project_id
         )
         db.session.add(comment)
+        Project.adjust_counter(project_id, 'comments_count', 1)
         db.session.commit()
         flash('Comentário adicionado com sucesso!', 'success')
     return redirect(url_for('project_detail', id=project_id))
@@ -189,10 +220,12 @@ def toggle_like(project_id):
     
     if like:
         db.session.delete(like)
+        Project.adjust_counter(project_id, 'likes_count', -1)
         liked = False
     else:
         like = Like(user_id=current_user.id, project_id=project_id)
         db.session.add(like)
+        Project.adjust_counter(project_id, 'likes_count', 1)
         liked = True
     
     db.session.commit()
@@ -237,9 +270,8 @@ def admin_projects():
     if not current_user.is_admin:
         abort(403)
     
-    page = request.args.get('page', 1, type=int)
-    projects = Project.query.order_by(desc(Project.created_at)).paginate(
-        page=page, per_page=10, error_out=False)
+    projects = keyset_paginate(Project.query.options(*Project.load_profile('card')), Project,
+                               per_page=10, cursor=request.args.get('cursor'))
     
     return render_template('admin/projects.html', projects=projects)
 
@@ -279,6 +311,8 @@ def admin_new_project():
             project.tags.append(tag)
         
         db.session.commit()
+        schedule_recommendation_refresh()
+        invalidate_pages('projects')
         flash('Project created successfully!', 'success')
         return redirect(url_for('admin_projects'))
     
@@ -309,6 +343,10 @@ def admin_edit_project(id):
             picture_file = save_picture(form.image.data)
             project.image_filename = picture_file
         
+        # Tag-only edits don't touch project columns; bump updated_at so
+        # incremental recommendation refreshes pick the project up
+        project.updated_at = datetime.utcnow()
+        
         # Clear existing tags and add new ones
         project.tags.clear()
         tags_list = parse_tags(form.tags.data)
@@ -320,6 +358,8 @@ def admin_edit_project(id):
             project.tags.append(tag)
         
         db.session.commit()
+        schedule_recommendation_refresh()
+        invalidate_pages('projects')
         flash('Project updated successfully!', 'success')
         return redirect(url_for('admin_projects'))
     
@@ -341,6 +381,8 @@ def admin_delete_project(id):
     
     db.session.delete(project)
     db.session.commit()
+    schedule_recommendation_refresh()
+    invalidate_pages('projects')
     flash('Project deleted successfully!', 'success')
     return redirect(url_for('admin_projects'))
 
@@ -367,6 +409,7 @@ def admin_new_category():
         )
         db.session.add(category)
         db.session.commit()
+        invalidate_pages('categories')
         flash('Category created successfully!', 'success')
         return redirect(url_for('admin_categories'))
     
@@ -403,6 +446,8 @@ def admin_about():
         else:
             db.session.add(about_me)
             db.session.commit()
+        about_me_cache.invalidate()
+        invalidate_pages('about')
         
         flash('About Me updated successfully!', 'success')
         return redirect(url_for('admin_about'))
@@ -573,11 +618,9 @@ def activate_user():
 @admin_required
 def admin_logs():
     """View admin action logs"""
-    page = request.args.get('page', 1, type=int)
-    
     from models import AdminLog
-    logs = AdminLog.query.order_by(AdminLog.created_at.desc()).paginate(
-        page=page, per_page=50, error_out=False)
+    logs = keyset_paginate(AdminLog.query, AdminLog, per_page=50, cursor=request.args.get('cursor'),
+                           total=approximate_count(AdminLog), total_is_approximate=True)
     
     return render_template('admin/logs.html', title='Admin Logs', logs=logs)
 
@@ -587,56 +630,60 @@ def admin_github_sync():
     """Sync GitHub repositories"""
     github_service = GitHubSyncService()
     
-    # Get the current authenticated GitHub user
+    # Get the current authenticated GitHub user; interactive: fails fast when the
+    # rate limit would make the page wait, falling back to the stored credentials
     github_user = None
     username = None
     try:
-        github_user_data = github_service.client.get_authenticated_user()
+        github_user_data = github_service.client.get_authenticated_user(interactive=True)
         if github_user_data:
             username = github_user_data.get('login')
             github_user = github_user_data
     except Exception as e:
         flash(f'Failed to get GitHub user info: {e}', 'warning')
+    if not username:
+        credentials = GitHubCredentials.query.filter_by(is_active=True).first()
+        username = credentials.username if credentials else None
     
     if request.method == 'POST':
         sync_type = request.form.get('sync_type', 'authenticated')
         target_username = request.form.get('username', username)
+        full_sync = request.form.get('full_sync') == '1'
         
+        # Syncs run on the job queue so the request returns immediately
         if sync_type == 'public' and target_username:
-            # Use public sync for any username
-            from github_public_sync import sync_user_public_repos
-            success, message, repos_synced = sync_user_public_repos(target_username)
-            
-            if success:
-                flash(f'GitHub public sync completed! Synced {repos_synced} repositories for user {target_username}.', 'success')
-            else:
-                flash(f'GitHub public sync failed: {message}', 'danger')
+            # Public sync for any username (same engine, no token)
+            enqueue_github_sync(target_username, full=full_sync, public=True, priority=PRIORITY_MANUAL)
+            flash(f'Sync queued for public repositories of {target_username}.', 'info')
+        elif not username:
+            flash('GitHub user not found. Please check your GitHub connection.', 'danger')
         else:
-            # Use authenticated sync
-            if not username:
-                flash('GitHub user not found. Please check your GitHub connection.', 'danger')
-            else:
-                success, message, repos_synced = github_service.sync_user_repositories(username)
-                
-                if success:
-                    flash(f'GitHub sync completed successfully! Synced {repos_synced} repositories for user {username}.', 'success')
-                else:
-                    flash(f'GitHub sync failed: {message}', 'danger')
+            enqueue_github_sync(username, full=full_sync, priority=PRIORITY_MANUAL)
+            flash(f'Sync queued for {username}.', 'info')
+        return redirect(url_for('admin_github_sync'))
     
     # Get current sync status
     last_sync = github_service.get_last_sync_info(username) if username else None
     github_repos = GitHubRepository.query.order_by(desc(GitHubRepository.last_sync_at)).limit(10).all()
     total_repos = GitHubRepository.query.count()
     all_languages = github_service.get_all_languages()
+    sync_jobs = active_sync_jobs()
     
     return render_template('admin/github_sync.html', 
                          last_sync=last_sync,
+                         sync_jobs=sync_jobs,
                          github_repos=github_repos,
                          total_repos=total_repos,
                          all_languages=all_languages,
                          github_user=github_user,
                          username=username)
 
+@app.route('/admin/github-sync/status')
+@admin_required
+def admin_github_sync_status():
+    """Queued syncs and progress of the running one, polled by the sync page"""
+    return jsonify(github_sync_status(request.args.get('username')))
+
 # Error handlers
 @app.errorhandler(403)
 def forbidden(error):
@@ -653,11 +700,13 @@ def internal_error(error):
 
 # New feature routes
 @app.route('/timeline')
+@cached_page('about')
 def timeline():
     """Career timeline page"""
     return render_template('timeline.html')
 
 @app.route('/skills-comparator')
+@cached_page('about')
 def skills_comparator():
     """Skills comparison tool"""
     return render_template('skills-comparator.html')
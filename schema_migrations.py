@@ -0,0 +1,86 @@
+"""
+Lightweight schema migrations applied at startup
+
+db.create_all() only creates missing tables, so columns and indexes added to
+existing models are applied here to keep older databases (including the
+bundled portfolio.db) in step with models.py.
+"""
+import logging
+from sqlalchemy import inspect, text
+from app import db
+
+logger = logging.getLogger(__name__)
+
+# (table, column, column DDL, backfill statement run right after the column is added)
+ADDED_COLUMNS = [
+    ('project', 'likes_count', 'INTEGER NOT NULL DEFAULT 0',
+     'UPDATE project SET likes_count = '
+     '(SELECT COUNT(*) FROM "like" WHERE "like".project_id = project.id)'),
+    ('project', 'comments_count', 'INTEGER NOT NULL DEFAULT 0',
+     'UPDATE project SET comments_count = '
+     '(SELECT COUNT(*) FROM comment WHERE comment.project_id = project.id)'),
+    ('github_sync_logs', 'repositories_skipped', 'INTEGER DEFAULT 0', None),
+    ('github_sync_logs', 'rate_limit_remaining', 'INTEGER', None),
+    ('github_sync_logs', 'rate_limit_limit', 'INTEGER', None),
+    ('github_sync_logs', 'rate_limit_reset_at', 'TIMESTAMP', None),
+    ('github_sync_logs', 'rate_limit_wait_seconds', 'FLOAT DEFAULT 0', None),
+    ('github_sync_logs', 'phase', 'VARCHAR(20)', None),
+    ('github_sync_logs', 'repositories_total', 'INTEGER', None),
+    ('github_sync_logs', 'repositories_processed', 'INTEGER DEFAULT 0', None),
+    ('github_sync_logs', 'current_repository', 'VARCHAR(200)', None),
+    ('github_sync_logs', 'progress_updated_at', 'TIMESTAMP', None),
+]
+
+# Indexes declared in models.py after their table already existed (created from the model definition)
+ADDED_INDEXES = [
+    ('github_repository_languages', 'ix_github_repository_languages_language_repository_id'),
+    ('github_repositories', 'ix_github_repositories_stargazers_pushed_at'),
+    ('github_repositories', 'ix_github_repositories_last_sync_at'),
+    ('github_sync_logs', 'ix_github_sync_logs_username_started_at'),
+    ('project', 'ix_project_published_created_at_id'),
+    ('comment', 'ix_comment_project_id_created_at'),
+    ('like', 'ix_like_project_id'),
+    ('project_skills', 'ix_project_skills_project_id'),
+    ('project_skills', 'ix_project_skills_skill_id'),
+    ('timeline_event', 'ix_timeline_event_published_event_date'),
+    ('project', 'ix_project_created_at_id'),
+    ('admin_log', 'ix_admin_log_created_at_id'),
+    ('jobs', 'uq_jobs_pending_dedup_key'),
+    ('jobs', 'ix_jobs_dedup_key_status'),
+]
+
+def apply_schema_migrations():
+    """
+    Add any missing columns and indexes to existing tables
+    Returns the list of (table, column or index name) pairs that were added
+    """
+    inspector = inspect(db.engine)
+    added = []
+
+    with db.engine.begin() as conn:
+        for table, column, ddl, backfill in ADDED_COLUMNS:
+            if not inspector.has_table(table):
+                continue
+
+            existing_columns = {col['name'] for col in inspector.get_columns(table)}
+            if column in existing_columns:
+                continue
+
+            conn.execute(text(f'ALTER TABLE "{table}" ADD COLUMN {column} {ddl}'))
+            if backfill:
+                conn.execute(text(backfill))
+            added.append((table, column))
+            logger.info(f"Schema migration: added {table}.{column}")
+
+        for table, index_name in ADDED_INDEXES:
+            if not inspector.has_table(table):
+                continue
+            if index_name in {index['name'] for index in inspector.get_indexes(table)}:
+                continue
+
+            index = next(index for index in db.metadata.tables[table].indexes if index.name == index_name)
+            index.create(conn)
+            added.append((table, index_name))
+            logger.info(f"Schema migration: added index {index_name} on {table}")
+
+    return added
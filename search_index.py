@@ -0,0 +1,159 @@
+"""
+Full-text search index for projects
+
+SQLite uses an FTS5 table kept in sync by triggers on the project table;
+PostgreSQL uses a generated tsvector column with a GIN index. Both rank by
+relevance and return highlighted snippets. On any other database (or an
+SQLite build without FTS5) search_projects() returns None and callers fall
+back to LIKE filters.
+"""
+import os
+import re
+import logging
+from typing import Dict, Iterable, List, Optional
+from markupsafe import Markup, escape
+from sqlalchemy import text, desc, func, literal_column, bindparam
+from app import db
+from models import Project
+
+logger = logging.getLogger(__name__)
+
+# Text search configuration used for the PostgreSQL tsvector
+TS_CONFIG = os.environ.get('SEARCH_TS_CONFIG', 'simple')
+
+# Snippet markers, replaced by <mark> after the snippet text is escaped
+_MARK_START = '\x02'
+_MARK_END = '\x03'
+
+# Detected backend: 'sqlite', 'postgresql' or None
+_backend = None
+
+SQLITE_STATEMENTS = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS project_fts USING fts5("
+    "title, description, content, tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS project_fts_insert AFTER INSERT ON project BEGIN "
+    "INSERT INTO project_fts (rowid, title, description, content) "
+    "VALUES (new.id, new.title, new.description, new.content); END",
+    "CREATE TRIGGER IF NOT EXISTS project_fts_update AFTER UPDATE OF title, description, content ON project BEGIN "
+    "DELETE FROM project_fts WHERE rowid = old.id; "
+    "INSERT INTO project_fts (rowid, title, description, content) "
+    "VALUES (new.id, new.title, new.description, new.content); END",
+    "CREATE TRIGGER IF NOT EXISTS project_fts_delete AFTER DELETE ON project BEGIN "
+    "DELETE FROM project_fts WHERE rowid = old.id; END",
+]
+
+POSTGRESQL_STATEMENTS = [
+    "ALTER TABLE project ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+    f"setweight(to_tsvector('{TS_CONFIG}', coalesce(title, '')), 'A') || "
+    f"setweight(to_tsvector('{TS_CONFIG}', coalesce(description, '')), 'B') || "
+    f"setweight(to_tsvector('{TS_CONFIG}', coalesce(content, '')), 'C')) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_project_search_vector ON project USING GIN (search_vector)",
+]
+
+def ensure_search_index() -> Optional[str]:
+    """
+    Create the full-text index for the current database if it is missing
+    Returns the backend in use, or None if full-text search is unavailable
+    """
+    global _backend
+    dialect = db.engine.dialect.name
+
+    try:
+        with db.engine.begin() as conn:
+            if dialect == 'sqlite':
+                created = not conn.execute(text(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'project_fts'"
+                )).first()
+                for statement in SQLITE_STATEMENTS:
+                    conn.execute(text(statement))
+                if created:
+                    _rebuild_sqlite(conn)
+            elif dialect == 'postgresql':
+                for statement in POSTGRESQL_STATEMENTS:
+                    conn.execute(text(statement))
+            else:
+                logger.info(f"Full-text search not supported on {dialect}, using LIKE search")
+                _backend = None
+                return None
+    except Exception as e:
+        logger.warning(f"Full-text search index unavailable, using LIKE search: {e}")
+        _backend = None
+        return None
+
+    _backend = dialect
+    return _backend
+
+def _rebuild_sqlite(conn):
+    conn.execute(text("DELETE FROM project_fts"))
+    conn.execute(text(
+        "INSERT INTO project_fts (rowid, title, description, content) "
+        "SELECT id, title, description, content FROM project"
+    ))
+
+def rebuild_search_index():
+    """Repopulate the SQLite FTS table from the project table"""
+    if _backend == 'sqlite':
+        with db.engine.begin() as conn:
+            _rebuild_sqlite(conn)
+
+def _terms(query_text: str) -> List[str]:
+    return re.findall(r'\w+', query_text.lower())
+
+def _sqlite_match(terms: Iterable[str]) -> str:
+    # Quoted prefix terms, implicitly ANDed; user input never reaches FTS5 syntax
+    return ' '.join(f'"{term}"*' for term in terms)
+
+def _pg_tsquery(terms: Iterable[str]):
+    return func.to_tsquery(TS_CONFIG, ' & '.join(f'{term}:*' for term in terms))
+
+def search_projects(base_query, query_text: str):
+    """
+    Restrict a Project query to full-text matches, ordered by relevance
+    Returns None when no full-text backend is available
+    """
+    terms = _terms(query_text)
+    if not _backend or not terms:
+        return None
+
+    if _backend == 'sqlite':
+        # bm25() is lower-is-better; title matches weigh most
+        matches = text(
+            "SELECT rowid AS project_id, bm25(project_fts, 10.0, 5.0, 1.0) AS rank "
+            "FROM project_fts WHERE project_fts MATCH :match"
+        ).bindparams(match=_sqlite_match(terms)).columns(
+            project_id=db.Integer, rank=db.Float
+        ).subquery('project_matches')
+        return base_query.join(matches, matches.c.project_id == Project.id).order_by(
+            matches.c.rank, desc(Project.created_at))
+
+    search_vector = literal_column('project.search_vector')
+    tsquery = _pg_tsquery(terms)
+    return base_query.filter(search_vector.op('@@')(tsquery)).order_by(
+        desc(func.ts_rank(search_vector, tsquery)), desc(Project.created_at))
+
+def _highlight(snippet: Optional[str]) -> Markup:
+    escaped = str(escape(snippet or ''))
+    return Markup(escaped.replace(_MARK_START, '<mark>').replace(_MARK_END, '</mark>'))
+
+def highlight_snippets(project_ids: List[int], query_text: str) -> Dict[int, Markup]:
+    """Return highlighted match snippets for the given projects"""
+    terms = _terms(query_text)
+    if not _backend or not terms or not project_ids:
+        return {}
+
+    if _backend == 'sqlite':
+        rows = db.session.execute(text(
+            "SELECT rowid, snippet(project_fts, -1, :start, :end, '…', 16) "
+            "FROM project_fts WHERE project_fts MATCH :match AND rowid IN :ids"
+        ).bindparams(bindparam('ids', expanding=True)), {
+            'start': _MARK_START, 'end': _MARK_END,
+            'match': _sqlite_match(terms), 'ids': list(project_ids)
+        }).all()
+    else:
+        document = func.concat_ws(' ', Project.description, Project.content)
+        options = f'StartSel={_MARK_START}, StopSel={_MARK_END}, MaxWords=30, MinWords=10'
+        rows = db.session.query(
+            Project.id, func.ts_headline(TS_CONFIG, document, _pg_tsquery(terms), options)
+        ).filter(Project.id.in_(project_ids)).all()
+
+    return {project_id: _highlight(snippet) for project_id, snippet in rows}
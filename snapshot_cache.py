@@ -0,0 +1,45 @@
+"""
+Process-local cache for values that are read on most requests but change rarely
+"""
+import time
+import threading
+
+_MISSING = object()
+
+class SnapshotCache:
+    """
+    Holds a single value produced by a loader function
+
+    The value is reloaded after ttl seconds (so other worker processes pick up
+    changes eventually) or immediately after invalidate() is called.
+    """
+
+    def __init__(self, loader, ttl: float = 300):
+        self.loader = loader
+        self.ttl = ttl
+        self._value = _MISSING
+        self._loaded_at = 0.0
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Return the cached value, loading it if missing or expired"""
+        with self._lock:
+            if self._value is not _MISSING and time.monotonic() - self._loaded_at < self.ttl:
+                return self._value
+            generation = self._generation
+
+        value = self.loader()
+
+        with self._lock:
+            # Don't store a value that was loaded before an invalidation
+            if generation == self._generation:
+                self._value = value
+                self._loaded_at = time.monotonic()
+        return value
+
+    def invalidate(self):
+        """Drop the cached value so the next get() reloads it"""
+        with self._lock:
+            self._value = _MISSING
+            self._generation += 1
@@ -0,0 +1,139 @@
+"""
+Deferred startup work
+
+Importing app.py only does local work (tables, migrations, search index), so
+scripts can import it freely and never claim jobs. The serving process calls
+start_server_tasks() from main.py: it starts the job worker, then GitHub
+credential setup and the initial repository sync are queued as a deduplicated
+job (see job_queue) due a few seconds later, once workers are serving, and
+exactly one worker claims and runs it; the recommendation refresh is queued the
+same way and the background sync scheduler starts. record_startup_time() measures the import against
+STARTUP_BUDGET_SECONDS.
+"""
+import os
+import time
+import logging
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+STARTUP_SYNC_ENABLED = os.environ.get('GITHUB_STARTUP_SYNC', '1') != '0'
+# Seconds to wait after import so the worker is already accepting requests
+STARTUP_SYNC_DELAY = float(os.environ.get('GITHUB_STARTUP_SYNC_DELAY', 5))
+# Skip the startup sync when one started this recently (e.g. another worker or a restart loop)
+STARTUP_SYNC_MIN_INTERVAL = timedelta(minutes=int(os.environ.get('GITHUB_STARTUP_SYNC_MIN_INTERVAL', 10)))
+# Cold start budget for importing the app
+STARTUP_BUDGET_SECONDS = float(os.environ.get('STARTUP_BUDGET_SECONDS', 5))
+
+def record_startup_time(app, started: float) -> float:
+    """Log the app import time against the startup budget and expose it as app.config['STARTUP_SECONDS']"""
+    elapsed = time.perf_counter() - started
+    app.config['STARTUP_SECONDS'] = elapsed
+    if elapsed > STARTUP_BUDGET_SECONDS:
+        logger.warning(f"Startup levou {elapsed:.2f}s (orçamento: {STARTUP_BUDGET_SECONDS:.1f}s)")
+    else:
+        logger.info(f"Startup concluído em {elapsed:.2f}s (orçamento: {STARTUP_BUDGET_SECONDS:.1f}s)")
+    return elapsed
+
+def run_startup_sync():
+    """Store GITHUB_TOKEN credentials (if set) and sync repositories unless a sync ran recently"""
+    from app import app
+    from models import GitHubCredentials, GitHubSyncLog
+    from github_sync import GitHubSyncService
+    from github_token_providers import EncryptedDBTokenProvider, EnvTokenProvider
+
+    with app.app_context():
+        github_token = os.environ.get('GITHUB_TOKEN')
+        validated = bool(github_token)
+        if github_token:
+            sync_service = GitHubSyncService(EnvTokenProvider(('GITHUB_TOKEN',)))
+            user_info = sync_service.client.get_authenticated_user()
+            username = user_info.get('login') if user_info else None
+            if not username:
+                logger.error("Token GitHub inválido - verifique suas permissões")
+                return
+            _store_env_credentials(sync_service.client, username, github_token)
+        else:
+            credentials = GitHubCredentials.query.filter_by(is_active=True).first()
+            if not credentials:
+                return
+            sync_service = GitHubSyncService(EncryptedDBTokenProvider())
+            username = credentials.username
+
+        last_sync = GitHubSyncLog.query.filter_by(username=username).order_by(GitHubSyncLog.started_at.desc()).first()
+        if last_sync and last_sync.started_at and datetime.utcnow() - last_sync.started_at < STARTUP_SYNC_MIN_INTERVAL:
+            logger.info("Sincronização de startup pulada - sincronização recente")
+            return
+
+        logger.info(f"Iniciando sincronização de repositórios para {username}...")
+        success, message, repos_synced = sync_service.sync_user_repositories(username, validated=validated)
+        if success:
+            logger.info(f"✅ Sincronização concluída: {repos_synced} repositórios carregados")
+        else:
+            logger.warning(f"⚠️ Sincronização parcial: {message}")
+
+def _store_env_credentials(client, username: str, github_token: str):
+    """Persist the environment token encrypted, unless the stored one is already the same"""
+    from models import GitHubCredentials
+    from crypto_utils import crypto_manager
+
+    if crypto_manager is None:
+        logger.info(f"GitHub conectado para: {username} (sem criptografia)")
+        return
+    try:
+        existing = GitHubCredentials.query.filter_by(username=username, is_active=True).first()
+        if existing and crypto_manager.decrypt(existing.encrypted_token) == github_token:
+            return
+        if client.store_github_credentials(username, github_token):
+            logger.info(f"GitHub credentials armazenadas para: {username}")
+    except Exception as e:
+        logger.warning(f"Aviso ao armazenar credenciais: {e}")
+
+def schedule_startup_sync(delay: float = STARTUP_SYNC_DELAY) -> bool:
+    """Queue the startup sync job, due in `delay` seconds (needs an app context)"""
+    if not STARTUP_SYNC_ENABLED:
+        return False
+    from job_queue import enqueue
+    from github_jobs import PRIORITY_STARTUP
+    enqueue('github_startup_sync', dedup_key='github-startup-sync', priority=PRIORITY_STARTUP, delay=delay)
+    return True
+
+def start_server_tasks():
+    """Start the job worker and background sync and queue the startup jobs (serving process only)"""
+    from app import app
+    from job_queue import start_worker
+
+    # A worker in a short-lived script could claim a job and exit mid-run, leaving
+    # it 'running' (and its dedup key blocked) until JOB_LOCK_TIMEOUT
+    if start_worker():
+        logger.info("Job worker ativado")
+
+    with app.app_context():
+        # Bring precomputed recommendations up to date without blocking startup
+        from recommendations import schedule_refresh
+        schedule_refresh()
+
+        try:
+            if not os.environ.get('GITHUB_TOKEN'):
+                logger.warning("="*80)
+                logger.warning("GITHUB_TOKEN não configurado!")
+                logger.warning("Para carregar automaticamente seus projetos GitHub:")
+                logger.warning("1. Vá em Secrets (🔒) no painel lateral do Replit")
+                logger.warning("2. Adicione: GITHUB_TOKEN = seu_token_github")
+                logger.warning("3. Reinicie a aplicação")
+                logger.warning("="*80)
+
+            if schedule_startup_sync():
+                logger.info("Sincronização inicial do GitHub agendada")
+
+            # Start background sync (optional); the startup job covers the initial run
+            try:
+                from auto_sync_scheduler import start_background_sync
+                if start_background_sync(initial_sync=False):
+                    logger.info("Sincronização automática em background ativada")
+            except Exception as e:
+                logger.debug(f"Background sync não iniciado: {e}")
+
+        except Exception as e:
+            logger.warning(f"GitHub setup error: {e}")
+            logger.info("Sistema continuará sem sincronização GitHub")
@@ -0,0 +1,78 @@
+"""
+Vectorized TF-IDF similarity engine for project recommendations
+
+The index is built once over all published projects (title, description,
+content and tags). Each document becomes an L2-normalized sparse TF-IDF row,
+so "top-k similar to project X" is a single sparse matrix-vector product.
+"""
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+import numpy as np
+from scipy import sparse
+
+_TOKEN_RE = re.compile(r'\w+')
+
+def tokenize(text_value: str) -> List[str]:
+    return _TOKEN_RE.findall((text_value or '').lower())
+
+def project_document(project) -> str:
+    """Text indexed for a project: title, description, content and tag names"""
+    tags = ' '.join(tag.name for tag in project.tags)
+    return ' '.join(filter(None, [project.title, project.description, project.content, tags]))
+
+class TfidfIndex:
+    """Sparse TF-IDF matrix over a set of documents keyed by id"""
+
+    def __init__(self, documents: Dict[int, str]):
+        self.ids = np.fromiter(documents.keys(), dtype=np.int64, count=len(documents))
+        self.row_of = {doc_id: row for row, doc_id in enumerate(self.ids.tolist())}
+        self.vocabulary: Dict[str, int] = {}
+
+        indptr = [0]
+        indices: List[int] = []
+        counts: List[int] = []
+        for text_value in documents.values():
+            term_counts = Counter(tokenize(text_value))
+            for term, count in term_counts.items():
+                indices.append(self.vocabulary.setdefault(term, len(self.vocabulary)))
+                counts.append(count)
+            indptr.append(len(indices))
+
+        term_frequencies = sparse.csr_matrix(
+            (np.asarray(counts, dtype=np.float64), np.asarray(indices, dtype=np.int64), np.asarray(indptr)),
+            shape=(len(self.ids), len(self.vocabulary))
+        )
+
+        # Smoothed idf, sublinear tf, then L2-normalize rows so dot product == cosine
+        document_frequency = np.bincount(term_frequencies.indices, minlength=len(self.vocabulary))
+        idf = np.log((1 + len(self.ids)) / (1 + document_frequency)) + 1
+        term_frequencies.data = 1 + np.log(term_frequencies.data)
+        weighted = term_frequencies @ sparse.diags(idf)
+        norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+        norms[norms == 0] = 1
+        self.matrix = sparse.csr_matrix(sparse.diags(1 / norms) @ weighted)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def similarities(self, doc_id: int) -> np.ndarray:
+        """Cosine similarity of every indexed document to doc_id"""
+        row = self.matrix[self.row_of[doc_id]].toarray().ravel()
+        return self.matrix @ row
+
+    def top_k(self, doc_id: int, k: int = 10, min_score: float = 0.0) -> List[Tuple[int, float]]:
+        """The k most similar documents to doc_id (excluding itself), best first"""
+        scores = self.similarities(doc_id)
+        scores[self.row_of[doc_id]] = -1
+
+        k = min(k, len(scores) - 1)
+        if k <= 0:
+            return []
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        candidates = candidates[np.argsort(-scores[candidates])]
+        return [(int(self.ids[row]), float(scores[row])) for row in candidates if scores[row] > min_score]
+
+    @classmethod
+    def from_projects(cls, projects: Iterable) -> 'TfidfIndex':
+        return cls({project.id: project_document(project) for project in projects})
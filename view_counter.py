@@ -0,0 +1,173 @@
+"""
+Write-behind buffer for Project.views_count
+
+Page views are aggregated in memory (or in a small shared SQLite file when
+several worker processes should pool their hits) and applied to the project
+table in a single batched UPDATE by a background flusher thread, every N
+seconds or as soon as N hits are pending. record() only buffers, so no
+visitor's request pays for a flush, and at most N seconds of views are lost
+if the process dies without running atexit.
+"""
+import os
+import atexit
+import sqlite3
+import logging
+import threading
+from typing import Dict
+from sqlalchemy import case, func, update
+from app import app, db
+from models import Project
+
+logger = logging.getLogger(__name__)
+
+class ViewCountBuffer:
+    """Aggregates project view increments and flushes them in batches"""
+
+    def __init__(self, flush_interval: float = 30, flush_threshold: int = 50, store_path: str = None):
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self.store_path = store_path
+        self._pending: Dict[int, int] = {}
+        self._pending_hits = 0
+        self._lock = threading.Lock()
+        self._flush_requested = threading.Event()
+        self._flusher = None
+        self._local = threading.local()
+
+        if self.store_path:
+            # WAL is a property of the database file, so it is set once here
+            conn = sqlite3.connect(self.store_path, timeout=5, isolation_level=None)
+            try:
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute(
+                    'CREATE TABLE IF NOT EXISTS view_hits ('
+                    'project_id INTEGER PRIMARY KEY, hits INTEGER NOT NULL)'
+                )
+            finally:
+                conn.close()
+
+    def _store(self) -> sqlite3.Connection:
+        """This thread's connection to the shared store, opened on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.store_path, timeout=5, isolation_level=None)
+        return conn
+
+    def record(self, project_id: int):
+        """Register one view; the flusher thread writes it out"""
+        if self.store_path:
+            self._store().execute(
+                'INSERT INTO view_hits (project_id, hits) VALUES (?, 1) '
+                'ON CONFLICT(project_id) DO UPDATE SET hits = hits + 1',
+                (project_id,)
+            )
+
+        with self._lock:
+            if not self.store_path:
+                self._pending[project_id] = self._pending.get(project_id, 0) + 1
+            self._pending_hits += 1
+            if self._pending_hits >= self.flush_threshold:
+                self._flush_requested.set()
+            # Started on first use so it runs in the serving (post-fork) process
+            if self._flusher is None or not self._flusher.is_alive():
+                self._flusher = threading.Thread(target=self._flush_loop, daemon=True, name='view-counter-flush')
+                self._flusher.start()
+
+    def _flush_loop(self):
+        """Flush every flush_interval seconds, or early once flush_threshold hits are pending"""
+        while True:
+            self._flush_requested.wait(self.flush_interval)
+            self._flush_requested.clear()
+            try:
+                with app.app_context():
+                    self.flush()
+            except Exception as e:
+                logger.error(f"View counter flush failed: {e}")
+
+    def pending(self, project_id: int) -> int:
+        """Views recorded for a project that have not been flushed yet"""
+        if self.store_path:
+            row = self._store().execute(
+                'SELECT hits FROM view_hits WHERE project_id = ?', (project_id,)
+            ).fetchone()
+            return row[0] if row else 0
+
+        with self._lock:
+            return self._pending.get(project_id, 0)
+
+    def _drain(self) -> Dict[int, int]:
+        """Take all pending increments out of the buffer"""
+        with self._lock:
+            self._pending_hits = 0
+            if not self.store_path:
+                increments, self._pending = self._pending, {}
+                return increments
+
+        conn = self._store()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            increments = dict(conn.execute('SELECT project_id, hits FROM view_hits').fetchall())
+            conn.execute('DELETE FROM view_hits')
+            conn.execute('COMMIT')
+            return increments
+        except Exception:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+
+    def _restore(self, increments: Dict[int, int]):
+        """Put increments back after a failed flush so no views are lost"""
+        if self.store_path:
+            self._store().executemany(
+                'INSERT INTO view_hits (project_id, hits) VALUES (?, ?) '
+                'ON CONFLICT(project_id) DO UPDATE SET hits = hits + excluded.hits',
+                list(increments.items())
+            )
+            return
+
+        with self._lock:
+            for project_id, hits in increments.items():
+                self._pending[project_id] = self._pending.get(project_id, 0) + hits
+
+    def flush(self) -> int:
+        """
+        Apply buffered increments in one UPDATE statement
+        Returns the number of views written
+        """
+        increments = self._drain()
+        if not increments:
+            return 0
+
+        # views_count may be NULL on rows created before it had a default
+        statement = update(Project).where(
+            Project.id.in_(list(increments))
+        ).values(
+            views_count=func.coalesce(Project.views_count, 0) + case(increments, value=Project.id, else_=0)
+        )
+
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(statement)
+        except Exception as e:
+            logger.error(f"Failed to flush view counts: {e}")
+            self._restore(increments)
+            return 0
+
+        total = sum(increments.values())
+        logger.debug(f"Flushed {total} views for {len(increments)} projects")
+        return total
+
+# Global instance configured from the environment
+view_counter = ViewCountBuffer(
+    flush_interval=float(os.environ.get('VIEW_COUNTER_FLUSH_SECONDS', 30)),
+    flush_threshold=int(os.environ.get('VIEW_COUNTER_FLUSH_HITS', 50)),
+    store_path=os.environ.get('VIEW_COUNTER_STORE_PATH')
+)
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        with app.app_context():
+            view_counter.flush()
+    except Exception as e:
+        logger.warning(f"Could not flush view counts on exit: {e}")